@@ -3,10 +3,20 @@ import os
 import json
 from datetime import datetime
 from src.processing import process_pdf
-from src.generation import generate_script, AVAILABLE_MODELS
-from src.tts import create_podcast_audio, VOICE_MAPPING, PACING_PRESETS
-from src.cache import hash_text, get_cache_key, get_from_cache, save_to_cache, cleanup_old_cache
+from src.generation import generate_script, spent_tokens, AVAILABLE_MODELS, TONES, MAX_INPUT_CHARS, api_key
+from src.tts import (create_podcast_audio, get_speaker_voices, start_voice_warm_up, SpeechPrefetcher,
+                     VOICE_MAPPING, PACING_PRESETS, DEFAULT_PACING, DEFAULT_MAX_CONCURRENCY)
+from src.cache import (get_markdown_key, get_script_key, get_translation_key, get_audio_key, get_from_cache,
+                       save_to_cache, get_audio_from_cache, save_audio_to_cache, cleanup_old_cache,
+                       get_cache_metrics)
 from src.analytics import record_file_processing, record_script_generation, record_audio_generation, get_stats
+from src.utils import generate_podcast_metadata, create_srt_subtitles, create_webvtt_subtitles
+from src.encoding import EXPORT_PRESETS, get_audio_settings, resolve_export
+from src.compression import compress_text, DEFAULT_TOKEN_BUDGET
+from src.singleflight import run_single_flight
+from src.rate_limit import get_scheduler_stats
+from src.multilingual import render_languages
+from src.series import generate_series
 
 # 1. Page Configuration
 st.set_page_config(
@@ -42,6 +52,10 @@ st.markdown("""
 st.title("🎧 AudioLearn")
 st.caption("Transform PDFs into Engaging Podcasts with AI | Multi-Language Support | Advanced Customization")
 
+if not api_key:
+    st.error("❌ Groq API Key not found! Please check your .env file.")
+    st.stop()
+
 # Clean up old cache periodically
 if 'cleanup_done' not in st.session_state:
     cleanup_old_cache(days=7)
@@ -66,7 +80,7 @@ with st.sidebar:
     # Tone Selection
     tone = st.selectbox(
         "Podcast Tone",
-        ["Fun & Casual", "Formal & Educational", "Debate Style"],
+        TONES,
         help="Affects the conversational style and language used"
     )
     
@@ -78,6 +92,11 @@ with st.sidebar:
         help="Language for text-to-speech synthesis"
     )
     
+    # Warm up the voice service for this language once per session
+    if st.session_state.get('warmed_language') != language:
+        start_voice_warm_up(language)
+        st.session_state['warmed_language'] = language
+    
     # Speaker Customization
     st.subheader("🎤 Speakers")
     speaker1_name = st.text_input("Speaker 1 Name", value="Siddharth", max_chars=20)
@@ -88,6 +107,7 @@ with st.sidebar:
     pacing = st.selectbox(
         "Speech Pacing",
         list(PACING_PRESETS.keys()),
+        index=list(PACING_PRESETS.keys()).index(DEFAULT_PACING),
         help="Controls how fast or slow the speakers talk"
     )
     
@@ -100,10 +120,68 @@ with st.sidebar:
         help="Pause duration between speaker transitions"
     )
     
+    export_formats = list(EXPORT_PRESETS.keys())
+    default_format = get_audio_settings()["format"]
+    audio_format = st.selectbox(
+        "Output Format",
+        export_formats,
+        index=export_formats.index(default_format) if default_format in export_formats else 0,
+        format_func=lambda name: EXPORT_PRESETS[name]["label"],
+        help="Opus and speech presets give much smaller files for spoken audio"
+    )
+    export_preset = resolve_export(audio_format)
+    
     # Advanced Settings
     with st.expander("🔧 Advanced Settings"):
-        enable_cache = st.checkbox("Enable Script Caching", value=True)
+        enable_cache = st.checkbox("Enable Script & Voice Caching", value=True)
         enable_analytics = st.checkbox("Enable Analytics Tracking", value=True)
+        max_concurrency = st.slider(
+            "Parallel Voice Requests",
+            min_value=1,
+            max_value=8,
+            value=DEFAULT_MAX_CONCURRENCY,
+            help="How many dialogue lines are synthesized at the same time"
+        )
+        fast_assembly = st.checkbox(
+            "Fast Assembly (no re-encode)",
+            value=False,
+            help="Splice the voice MP3 streams directly instead of decoding and re-encoding the episode"
+        )
+        plan_lines = st.checkbox(
+            "Smart Line Planning",
+            value=True,
+            help="Merge very short lines from the same speaker and split very long ones into balanced voice requests"
+        )
+        progressive_playback = st.checkbox(
+            "Progressive Playback",
+            value=True,
+            help="Start listening to the first lines while the rest of the episode is still recording"
+        )
+        compress_input = st.checkbox(
+            "Compress Input",
+            value=True,
+            help="Drop references, page headers/footers, images and long tables before sending the document to the model"
+        )
+        token_budget = st.slider(
+            "Input Token Budget",
+            min_value=2000,
+            max_value=30000,
+            value=DEFAULT_TOKEN_BUDGET,
+            step=1000,
+            disabled=not compress_input,
+            help="Compressed input is trimmed evenly across sections to about this many tokens"
+        )
+        stream_script = st.checkbox(
+            "Stream Script Generation",
+            value=True,
+            help="Show dialogue lines as the model writes them"
+        )
+        prerecord_lines = st.checkbox(
+            "Record Voices While Writing",
+            value=False,
+            disabled=not (stream_script and enable_cache),
+            help="Start synthesizing each streamed line right away (needs streaming and caching)"
+        )
     
     # Analytics Sidebar
     st.markdown("---")
@@ -116,6 +194,37 @@ with st.sidebar:
             st.metric("Scripts Generated", stats["total_scripts_generated"])
         with col2:
             st.metric("Audio Files", stats["total_audio_files"])
+        
+        scheduler = get_scheduler_stats()
+        st.caption(
+            f"🚦 LLM queue: {scheduler['queue_depth']} waiting · avg wait {scheduler['avg_wait_seconds']:.1f}s "
+            f"(max {scheduler['max_wait_seconds']:.1f}s) · {scheduler['throttled']} rate-limit pauses"
+        )
+        
+        cache_metrics = get_cache_metrics()
+        cache_total = cache_metrics.pop("total")
+        if cache_total["lookups"]:
+            st.caption(
+                f"♻️ Cache: {cache_total['hit_rate']:.0%} hit rate ({cache_total['hits']} hits, "
+                f"{cache_total['misses']} misses, {cache_total['expired']} expired, {cache_total['errors']} errors) · "
+                f"avg lookup {cache_total['avg_lookup_ms']:.1f}ms · ~{cache_total['tokens_saved']:,} LLM tokens saved"
+            )
+            with st.expander("Cache by stage"):
+                st.dataframe([
+                    {
+                        "stage": stage,
+                        "hit rate": f"{metrics['hit_rate']:.0%}",
+                        "hits": metrics["hits"],
+                        "misses": metrics["misses"],
+                        "expired": metrics["expired"],
+                        "errors": metrics["errors"],
+                        "read KB": round(metrics["bytes_read"] / 1024),
+                        "written KB": round(metrics["bytes_written"] / 1024),
+                        "avg ms": metrics["avg_lookup_ms"],
+                        "max ms": metrics["max_lookup_ms"],
+                    }
+                    for stage, metrics in cache_metrics.items()
+                ], hide_index=True, use_container_width=True)
     
     # About Section
     st.markdown("---")
@@ -138,15 +247,35 @@ with st.sidebar:
 
 
 # 5. Main Application Logic
+def show_dialogue_line(line):
+    """Render one script line as a chat message with the speaker's avatar."""
+    speaker = line["speaker"]
+    
+    if speaker == speaker1_name:
+        avatar_icon = "🧑‍💻"
+        role = f"{speaker1_name} (Host)"
+    else:
+        avatar_icon = "👩‍🔬"
+        role = f"{speaker2_name} (Expert)"
+    
+    with st.chat_message(role, avatar=avatar_icon):
+        st.write(line["text"])
+
 if uploaded_file:
     # --- PHASE 1: PROCESSING (Ingestion) ---
-    if 'processed_file' not in st.session_state or st.session_state['processed_file'] != uploaded_file.name:
+    # Keyed by content, so a re-upload of the same PDF (any name) reuses its extraction
+    markdown_key = get_markdown_key(uploaded_file.getvalue())
+    if 'processed_file' not in st.session_state or st.session_state['processed_file'] != markdown_key:
         with st.spinner("🧠 Reading & Analyzing Document..."):
-            data = process_pdf(uploaded_file)
+            data = get_from_cache(markdown_key, stage="markdown") if enable_cache else None
+            if data is None:
+                data = process_pdf(uploaded_file)
+                if data and enable_cache:
+                    save_to_cache(data, markdown_key, {"file": uploaded_file.name}, stage="markdown")
             
             if data:
                 # Store results in session state
-                st.session_state['processed_file'] = uploaded_file.name
+                st.session_state['processed_file'] = markdown_key
                 st.session_state['pdf_text'] = data['text']
                 st.session_state['word_count'] = data['word_count']
                 st.session_state['est_time'] = data['est_reading_time']
@@ -187,9 +316,17 @@ if uploaded_file:
         
         with col_gen1:
             if st.button("🎙️ Generate Podcast Script", type="primary", use_container_width=True):
-                # Check cache first
-                text_hash = hash_text(st.session_state['pdf_text'])
-                cache_key = get_cache_key(text_hash, speaker1_name, speaker2_name, tone)
+                source_text = st.session_state['pdf_text']
+                if compress_input:
+                    source_text, compression = compress_text(source_text, token_budget=token_budget)
+                    st.caption(
+                        f"🗜️ Input compressed: ~{compression['original_tokens']:,} → "
+                        f"~{compression['final_tokens']:,} tokens "
+                        f"(budget {compression['token_budget']:,})"
+                    )
+                
+                # Check cache first (keyed by the whole text and every setting that shapes the script)
+                cache_key = get_script_key(source_text, selected_model, tone, speaker1_name, speaker2_name)
                 
                 cached_script = None
                 if enable_cache:
@@ -203,35 +340,113 @@ if uploaded_file:
                         del st.session_state['audio_file']
                     st.success("✅ Script loaded from cache!")
                 else:
+                    long_document = len(source_text) > MAX_INPUT_CHARS
+                    if long_document:
+                        st.info("📚 Long document: condensing it section by section before drafting the script")
+                    
+                    generation_stats = {}
+                    on_line = None
+                    prefetcher = None
+                    if stream_script:
+                        # Live script preview, replaced by the full view once done
+                        live_placeholder = st.empty()
+                        live_box = live_placeholder.container()
+                        with live_box:
+                            st.subheader("📝 Script Preview (live)")
+                        if prerecord_lines and enable_cache:
+                            prefetcher = SpeechPrefetcher(
+                                language=language,
+                                pacing=pacing,
+                                silence_duration=silence_duration,
+                                custom_speakers=get_speaker_voices(language, speaker1_name, speaker2_name),
+                                plan=plan_lines,
+                                max_concurrency=max_concurrency
+                            )
+                        
+                        def on_line(index, line):
+                            with live_box:
+                                show_dialogue_line(line)
+                            if prefetcher:
+                                prefetcher.add_line(line)
+                    
+                    progress_bar = st.progress(0)
+                    
+                    def show_progress(event):
+                        if event["level"] == "warning":
+                            st.warning(event["message"])
+                        elif event["level"] == "error":
+                            st.error(event["message"])
+                        else:
+                            progress_bar.progress(event["progress"] or 0.0, text=event["message"])
+                    
+                    def show_waiting():
+                        st.info("⏳ The same script is already being generated elsewhere; waiting for it")
+                    
                     with st.spinner(f"🤖 Drafting the Script with {selected_model}..."):
-                        script_data = generate_script(
-                            st.session_state['pdf_text'],
-                            model=selected_model,
-                            tone=tone,
-                            speaker1=speaker1_name,
-                            speaker2=speaker2_name
+                        # Identical concurrent requests (double clicks, other sessions) share one generation
+                        script_data, shared_generation = run_single_flight(
+                            cache_key,
+                            lambda: generate_script(
+                                source_text,
+                                model=selected_model,
+                                tone=tone,
+                                speaker1=speaker1_name,
+                                speaker2=speaker2_name,
+                                stats=generation_stats,
+                                on_line=on_line,
+                                on_progress=show_progress
+                            ),
+                            on_wait=show_waiting
                         )
-                        
+                    progress_bar.empty()
+                    
+                    if stream_script:
+                        live_placeholder.empty()
+                    if prefetcher:
+                        with st.spinner("🔊 Finishing voice recordings..."):
+                            prefetch_summary = prefetcher.finish(wait=bool(script_data))
                         if script_data:
-                            st.session_state['script'] = script_data
-                            
-                            # Save to cache
-                            if enable_cache:
-                                save_to_cache(script_data, cache_key, {
-                                    "tone": tone,
-                                    "model": selected_model,
-                                    "speakers": [speaker1_name, speaker2_name]
-                                })
-                            
-                            # Record analytics
-                            if enable_analytics:
-                                record_script_generation(selected_model, tone, speaker1_name, speaker2_name)
-                            
-                            if 'audio_file' in st.session_state:
-                                del st.session_state['audio_file']
-                            st.success("✅ Script generated successfully!")
-                        else:
-                            st.error("❌ Failed to generate script. Check API key and retry.")
+                            st.caption(f"🔊 {prefetch_summary['completed']} voice requests recorded while writing")
+                    
+                    if script_data:
+                        st.session_state['script'] = script_data
+                        if shared_generation:
+                            st.caption("♻️ Reused the result of an identical generation that was already running")
+                        
+                        for level, stage in enumerate(generation_stats.get("map", []), 1):
+                            st.caption(
+                                f"🗂️ Condense pass {level}: {stage['sections']} sections, "
+                                f"{stage['input_chars']:,} → {stage['output_chars']:,} chars in {stage['seconds']:.1f}s "
+                                f"({stage['prompt_tokens']:,} prompt + {stage['completion_tokens']:,} completion tokens)"
+                            )
+                        script_stage = generation_stats.get("script", {})
+                        if script_stage:
+                            st.caption(
+                                f"✍️ Script draft: {script_stage.get('seconds', 0):.1f}s "
+                                f"({script_stage.get('prompt_tokens', 0):,} prompt + "
+                                f"{script_stage.get('completion_tokens', 0):,} completion tokens)"
+                                + (f", first line after {script_stage['first_token_seconds']:.1f}s"
+                                   if script_stage.get('first_token_seconds') else "")
+                            )
+                        
+                        # Save to cache
+                        if enable_cache:
+                            save_to_cache(script_data, cache_key, {
+                                "tone": tone,
+                                "model": selected_model,
+                                "speakers": [speaker1_name, speaker2_name],
+                                "tokens": spent_tokens(generation_stats)
+                            })
+                        
+                        # Record analytics (a shared result was already counted by its leader)
+                        if enable_analytics and not shared_generation:
+                            record_script_generation(selected_model, tone, speaker1_name, speaker2_name)
+                        
+                        if 'audio_file' in st.session_state:
+                            del st.session_state['audio_file']
+                        st.success("✅ Script generated successfully!")
+                    else:
+                        st.error("❌ Failed to generate script. Check API key and retry.")
         
         with col_gen2:
             st.markdown("")
@@ -253,6 +468,67 @@ if uploaded_file:
                     mime="application/json"
                 )
 
+        # --- SERIES MODE: long documents as several episodes ---
+        with st.expander("📚 Split into Episodes"):
+            episode_count = st.number_input("Number of episodes", min_value=2, max_value=10, value=3)
+            st.caption("Scripts for the next episodes are written while the current one is being recorded.")
+            if st.button("📚 Generate Series", use_container_width=True):
+                series_text = st.session_state['pdf_text']
+                if compress_input:
+                    # Each episode gets the full budget
+                    series_text, _ = compress_text(series_text, token_budget=token_budget * episode_count)
+                
+                series_box = st.container()
+                
+                def show_episode(number, result):
+                    with series_box:
+                        if not result["audio_file"]:
+                            st.error(f"❌ Episode {number} failed")
+                            return
+                        entry = result["report"]
+                        st.markdown(f"**Episode {number}** · {len(result['script'])} lines · "
+                                    f"script {entry['script_seconds']:.1f}s · recording {entry['audio_seconds']:.1f}s")
+                        with open(result["audio_file"], "rb") as audio_data:
+                            episode_audio = audio_data.read()
+                        st.audio(episode_audio, format=export_preset["mime"])
+                        st.download_button(
+                            label=f"⬇️ Download Episode {number}",
+                            data=episode_audio,
+                            file_name=f"audiolearn_{uploaded_file.name.replace('.pdf', '')}_ep{number:02d}.{export_preset['extension']}",
+                            mime=export_preset["mime"],
+                            key=f"download_episode_{number}"
+                        )
+                
+                with st.spinner(f"📚 Producing {episode_count} episodes..."):
+                    series_results, series_report = generate_series(
+                        series_text,
+                        episode_count,
+                        model=selected_model,
+                        tone=tone,
+                        speaker1=speaker1_name,
+                        speaker2=speaker2_name,
+                        language=language,
+                        pacing=pacing,
+                        silence_duration=silence_duration,
+                        max_concurrency=max_concurrency,
+                        use_cache=enable_cache,
+                        assembly="mp3" if fast_assembly else "pcm",
+                        plan=plan_lines,
+                        audio_format=audio_format,
+                        on_episode=show_episode
+                    )
+                
+                if enable_analytics:
+                    for result in series_results:
+                        if result["script"]:
+                            record_script_generation(selected_model, tone, speaker1_name, speaker2_name)
+                        if result["timings"]:
+                            record_audio_generation(round(result["timings"]["total_duration_ms"] / 1000, 1))
+                st.caption(
+                    f"⏱️ {len(series_results)} episodes in {series_report['total_seconds']:.1f}s "
+                    f"(stages one after another: ~{series_report['stage_seconds']:.1f}s)"
+                )
+
     # --- PHASE 4: DISPLAY (The Script UI) ---
     if 'script' in st.session_state:
         st.subheader("📝 Script Preview")
@@ -290,97 +566,289 @@ if uploaded_file:
         container = st.container()
         with container:
             for line in st.session_state['script']:
-                # Dynamic avatars based on speaker
-                speaker = line["speaker"]
-                
-                if speaker == speaker1_name:
-                    avatar_icon = "🧑‍💻"
-                    role = f"{speaker1_name} (Host)"
-                else:
-                    avatar_icon = "👩‍🔬"
-                    role = f"{speaker2_name} (Expert)"
-                
-                # Render Chat Message
-                with st.chat_message(role, avatar=avatar_icon):
-                    st.write(line["text"])
+                show_dialogue_line(line)
 
         # --- PHASE 5: AUDIO GENERATION (The Voice) ---
         st.markdown("---")
         st.subheader("🎧 Generate & Listen to Podcast")
         
+        def show_subtitle_downloads(timings):
+            """Offer subtitles and metadata built from the measured audio timeline."""
+            if not timings:
+                return
+            base_name = f"audiolearn_{uploaded_file.name.replace('.pdf', '')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            metadata = generate_podcast_metadata(uploaded_file.name, st.session_state['script'], {
+                "word_count": st.session_state['word_count'],
+                "reading_time": st.session_state['est_time'],
+                "model": selected_model,
+                "tone": tone,
+                "language": language,
+                "speakers": [speaker1_name, speaker2_name],
+                "pacing": pacing,
+                "silence": silence_duration
+            }, timings=timings)
+            
+            col_sub1, col_sub2, col_sub3 = st.columns(3)
+            with col_sub1:
+                st.download_button(
+                    label="💬 Subtitles (SRT)",
+                    data=create_srt_subtitles(st.session_state['script'], timings=timings),
+                    file_name=f"{base_name}.srt",
+                    mime="text/plain",
+                    use_container_width=True
+                )
+            with col_sub2:
+                st.download_button(
+                    label="💬 Word Captions (VTT)",
+                    data=create_webvtt_subtitles(timings),
+                    file_name=f"{base_name}.vtt",
+                    mime="text/vtt",
+                    use_container_width=True
+                )
+            with col_sub3:
+                st.download_button(
+                    label="🏷️ Metadata (JSON)",
+                    data=json.dumps(metadata, indent=2),
+                    file_name=f"{base_name}_metadata.json",
+                    mime="application/json",
+                    use_container_width=True
+                )
+        
         # Check if audio exists
         if 'audio_file' in st.session_state and os.path.exists(st.session_state['audio_file']):
             st.success("✅ Audio is ready!")
             
             # Play audio
+            ready_preset = st.session_state.get('audio_preset', resolve_export("mp3"))
             with open(st.session_state['audio_file'], "rb") as audio_data:
                 audio_bytes = audio_data.read()
-                st.audio(audio_bytes, format='audio/mp3')
+                st.audio(audio_bytes, format=ready_preset["mime"])
             
             # Download Button
             st.download_button(
-                label="⬇️ Download Podcast MP3",
+                label=f"⬇️ Download Podcast {ready_preset['extension'].upper()}",
                 data=audio_bytes,
-                file_name=f"audiolearn_{uploaded_file.name.replace('.pdf', '')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3",
-                mime="audio/mp3",
+                file_name=f"audiolearn_{uploaded_file.name.replace('.pdf', '')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ready_preset['extension']}",
+                mime=ready_preset["mime"],
                 use_container_width=True
             )
+            show_subtitle_downloads(st.session_state.get('audio_timings'))
         else:
             # Generate Audio Button
             if st.button("▶️ Generate Audio with Voices", type="primary", use_container_width=True):
                 try:
-                    with st.spinner(f"🔊 Recording Audio with {language} voices... ({speaker1_name} & {speaker2_name} are speaking)"):
-                        audio_file = create_podcast_audio(
-                            st.session_state['script'],
-                            language=language,
-                            pacing=pacing,
-                            silence_duration=silence_duration,
-                            custom_speakers={
-                                speaker1_name: VOICE_MAPPING[language].get(speaker1_name, list(VOICE_MAPPING[language].values())[0]),
-                                speaker2_name: VOICE_MAPPING[language].get(speaker2_name, list(VOICE_MAPPING[language].values())[1] if len(VOICE_MAPPING[language]) > 1 else list(VOICE_MAPPING[language].values())[0])
-                            }
-                        )
+                    # Parts published while the episode is still rendering
+                    parts_placeholder = st.empty()
+                    parts_box = parts_placeholder.container()
+                    
+                    def show_part(part_number, mp3_bytes, info):
+                        with parts_box:
+                            first_line, last_line = info["lines"][0] + 1, info["lines"][-1] + 1
+                            line_label = f"line {first_line}" if first_line == last_line else f"lines {first_line}-{last_line}"
+                            st.caption(f"▶️ Part {part_number} · {line_label} · ready after {info['seconds_since_start']:.1f}s")
+                            st.audio(mp3_bytes, format='audio/mp3')
+                    
+                    render_stats = {}
+                    audio_key = get_audio_key(
+                        st.session_state['script'],
+                        language,
+                        get_speaker_voices(language, speaker1_name, speaker2_name),
+                        pacing,
+                        silence_duration,
+                        f"{export_preset['name']}@{export_preset['bitrate']}",
+                        plan_lines,
+                        "mp3" if fast_assembly else "pcm"
+                    )
+                    audio_file, audio_timings = (get_audio_from_cache(audio_key, export_preset["extension"])
+                                                 if enable_cache else (None, None))
+                    if audio_file:
+                        st.info("♻️ Using cached audio from a previous recording")
+                    else:
+                        with st.spinner(f"🔊 Recording Audio with {language} voices... ({speaker1_name} & {speaker2_name} are speaking)"):
+                            audio_file, audio_timings = create_podcast_audio(
+                                st.session_state['script'],
+                                language=language,
+                                pacing=pacing,
+                                silence_duration=silence_duration,
+                                custom_speakers=get_speaker_voices(language, speaker1_name, speaker2_name),
+                                max_concurrency=max_concurrency,
+                                stats=render_stats,
+                                use_cache=enable_cache,
+                                assembly="mp3" if fast_assembly else "pcm",
+                                on_part=show_part if progressive_playback else None,
+                                return_timings=True,
+                                plan=plan_lines,
+                                audio_format=audio_format
+                            )
+                            parts_placeholder.empty()
+                        if audio_file and enable_cache:
+                            save_audio_to_cache(audio_key, audio_file, audio_timings, {
+                                "language": language,
+                                "speakers": [speaker1_name, speaker2_name],
+                                "format": export_preset["name"]
+                            })
+                    
+                    if audio_file and os.path.exists(audio_file):
+                        # Store in session state
+                        st.session_state['audio_file'] = audio_file
+                        st.session_state['audio_timings'] = audio_timings
+                        st.session_state['audio_preset'] = export_preset
+                        
+                        # Record analytics (a cached episode was counted when it was recorded)
+                        if enable_analytics and render_stats:
+                            record_audio_generation(round(audio_timings["total_duration_ms"] / 1000, 1))
                         
-                        if audio_file and os.path.exists(audio_file):
-                            # Store in session state
-                            st.session_state['audio_file'] = audio_file
-                            
-                            # Record analytics
-                            if enable_analytics:
-                                record_audio_generation(0)  # Duration tracking could be added
-                            
-                            st.success("✅ Audio Generated Successfully!")
-                            
-                            # Play audio
-                            with open(audio_file, "rb") as audio_data:
-                                audio_bytes = audio_data.read()
-                                st.audio(audio_bytes, format='audio/mp3')
-                            
-                            # Download Button
-                            st.download_button(
-                                label="⬇️ Download Podcast MP3",
-                                data=audio_bytes,
-                                file_name=f"audiolearn_{uploaded_file.name.replace('.pdf', '')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3",
-                                mime="audio/mp3",
-                                use_container_width=True
+                        st.success("✅ Audio Generated Successfully!")
+                        
+                        # Render timings
+                        line_timings = render_stats.get("line_timings", [])
+                        if line_timings:
+                            slowest = max(line_timings, key=lambda t: t["seconds"])
+                            st.caption(
+                                f"⏱️ Rendered {len(line_timings)} voice requests in {render_stats['total_seconds']:.1f}s "
+                                f"({render_stats['max_concurrency']} in parallel) · "
+                                f"slowest line #{slowest['index'] + 1}: {slowest['seconds']:.1f}s"
                             )
-                            
-                        else:
-                            st.error("❌ Failed to generate audio. Please check:")
-                            st.markdown("""
-                            - **FFmpeg is installed** (required by pydub)
-                                - Mac: `brew install ffmpeg`
-                                - Windows: Download from [gyan.dev](https://www.gyan.dev/ffmpeg/builds/)
-                            - Your script has valid content
-                            - Check console for detailed error messages
-                            """)
-                            
+                        if render_stats.get("time_to_first_audio") is not None:
+                            st.caption(
+                                f"⚡ Time to first audio: {render_stats['time_to_first_audio']:.1f}s "
+                                f"({len(render_stats['parts'])} progressive parts)"
+                            )
+                        if "export" in render_stats:
+                            export_info = render_stats["export"]
+                            st.caption(
+                                f"💾 {EXPORT_PRESETS[export_info['format']]['label']}: "
+                                f"{export_info['bytes'] / 1024:,.0f} KB, encoded in {export_info['encode_seconds']:.1f}s"
+                            )
+                        network = render_stats.get("network", {})
+                        if network.get("requests"):
+                            st.caption(
+                                f"🔌 Voice service: {network['requests']} requests over "
+                                f"{network['connections_opened']} new connections · avg handshake "
+                                f"{network['avg_handshake_ms']:.0f}ms vs synthesis {network['avg_synthesis_ms']:.0f}ms"
+                            )
+                        if enable_cache and "segment_cache" in render_stats:
+                            st.caption(
+                                f"♻️ Voice cache: {render_stats['segment_cache']['hits']} lines reused, "
+                                f"{render_stats['segment_cache']['misses']} synthesized"
+                            )
+                        
+                        # Play audio
+                        with open(audio_file, "rb") as audio_data:
+                            audio_bytes = audio_data.read()
+                            st.audio(audio_bytes, format=export_preset["mime"])
+                        
+                        # Download Button
+                        st.download_button(
+                            label=f"⬇️ Download Podcast {export_preset['extension'].upper()}",
+                            data=audio_bytes,
+                            file_name=f"audiolearn_{uploaded_file.name.replace('.pdf', '')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_preset['extension']}",
+                            mime=export_preset["mime"],
+                            use_container_width=True
+                        )
+                        show_subtitle_downloads(audio_timings)
+                        
+                    else:
+                        st.error("❌ Failed to generate audio. Please check:")
+                        st.markdown("""
+                        - **FFmpeg is installed** (required by pydub)
+                            - Mac: `brew install ffmpeg`
+                            - Windows: Download from [gyan.dev](https://www.gyan.dev/ffmpeg/builds/)
+                        - Your script has valid content
+                        - Check console for detailed error messages
+                        """)
+                        
                 except ImportError as e:
                     st.error(f"❌ Missing dependency: {e}")
                     st.info("Install required packages: `pip install edge-tts pydub nest-asyncio`")
                 except Exception as e:
                     st.error(f"❌ Error generating audio: {str(e)[:200]}")
                     st.info("Check the console for detailed error logs.")
+        
+        # --- Multi-language: one script, every selected language rendered together ---
+        with st.expander("🌍 Render in Several Languages"):
+            render_language_list = st.multiselect(
+                "Languages",
+                options=list(VOICE_MAPPING.keys()),
+                default=list(VOICE_MAPPING.keys()),
+                help="The script is translated once per language and all languages are recorded at the same time"
+            )
+            if st.button("🌍 Render Selected Languages", use_container_width=True, disabled=not render_language_list):
+                translation_keys = {
+                    lang: get_translation_key(st.session_state['script'], lang, selected_model)
+                    for lang in render_language_list
+                }
+                cached_translations = {}
+                if enable_cache:
+                    for lang, key in translation_keys.items():
+                        cached = get_from_cache(key, stage="translation")
+                        if cached:
+                            cached_translations[lang] = cached
+                
+                try:
+                    with st.spinner(f"🌍 Translating and recording {', '.join(render_language_list)}..."):
+                        language_results, language_report = render_languages(
+                            st.session_state['script'],
+                            render_language_list,
+                            speaker1=speaker1_name,
+                            speaker2=speaker2_name,
+                            model=selected_model,
+                            translations=cached_translations,
+                            pacing=pacing,
+                            silence_duration=silence_duration,
+                            max_concurrency=max_concurrency,
+                            use_cache=enable_cache,
+                            assembly="mp3" if fast_assembly else "pcm",
+                            plan=plan_lines,
+                            audio_format=audio_format
+                        )
+                
+                    for lang, result in language_results.items():
+                        if enable_cache and result["translated"]:
+                            save_to_cache(result["script"], translation_keys[lang], {
+                                "model": selected_model,
+                                "language": lang,
+                                "speakers": [speaker1_name, speaker2_name],
+                                "tokens": language_report["languages"][lang].get("translation_tokens", 0)
+                            }, stage="translation")
+                    
+                        entry = language_report["languages"][lang]
+                        st.markdown(f"**{lang}**")
+                        if not result["audio_file"]:
+                            st.error(f"❌ Failed to record {lang}"
+                                     + (f": {entry['error']}" if entry.get("error") else ""))
+                            continue
+                        st.caption(
+                            f"⏱️ Translation {entry['translation_seconds']:.1f}s · recording {entry['render_seconds']:.1f}s · "
+                            f"{entry['audio_duration_ms'] / 60000:.1f} min of audio"
+                        )
+                        with open(result["audio_file"], "rb") as audio_data:
+                            language_audio = audio_data.read()
+                        os.remove(result["audio_file"])
+                        st.audio(language_audio, format=export_preset["mime"])
+                        st.download_button(
+                            label=f"⬇️ Download {lang} {export_preset['extension'].upper()}",
+                            data=language_audio,
+                            file_name=f"audiolearn_{uploaded_file.name.replace('.pdf', '')}_{lang.lower()}.{export_preset['extension']}",
+                            mime=export_preset["mime"],
+                            use_container_width=True,
+                            key=f"download_{lang}"
+                        )
+                
+                    st.caption(
+                        f"🌍 {len(language_results)} languages in {language_report['total_seconds']:.1f}s "
+                        f"(one after another: ~{language_report['sequential_seconds']:.1f}s)"
+                    )
+                    st.download_button(
+                        label="📊 Timing Report (JSON)",
+                        data=json.dumps(language_report, indent=2),
+                        file_name="audiolearn_language_report.json",
+                        mime="application/json",
+                        key="download_language_report"
+                    )
+                except Exception as e:
+                    st.error(f"❌ Error rendering languages: {str(e)[:200]}")
+                    st.info("Check the console for detailed error logs.")
 
 else:
     # Empty State (Welcome Screen)
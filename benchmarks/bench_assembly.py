@@ -0,0 +1,75 @@
+"""
+Benchmark: episode assembly cost for 10, 100 and 500 line scripts.
+
+Compares the old `combined += segment + silence` loop against
+assemble_segments (single PCM join) and concat_mp3_segments (frame splice).
+Segments are synthetic, so no network or ffmpeg is needed.
+
+Usage:
+    python -m benchmarks.bench_assembly [--line-seconds 4] [--repeat 3]
+"""
+import argparse
+import os
+import time
+from pydub import AudioSegment
+from src.tts import assemble_segments, concat_mp3_segments, EDGE_TTS_FRAME_RATE
+
+LINE_COUNTS = [10, 100, 500]
+SILENCE_MS = 300
+
+def make_segments(count, line_seconds):
+    """Build decoded-looking segments (24 kHz mono 16-bit) of noise."""
+    frames = int(EDGE_TTS_FRAME_RATE * line_seconds)
+    return [
+        AudioSegment(data=os.urandom(frames * 2), sample_width=2,
+                     frame_rate=EDGE_TTS_FRAME_RATE, channels=1)
+        for _ in range(count)
+    ]
+
+def make_mp3_chunks(count, line_seconds):
+    """Build byte blobs the size of 48 kbit/s edge-tts segments."""
+    return [os.urandom(int(48000 / 8 * line_seconds)) for _ in range(count)]
+
+def assemble_quadratic(segments, silence_duration):
+    """The original loop from generate_full_audio."""
+    combined_audio = AudioSegment.empty()
+    silence = AudioSegment.silent(duration=silence_duration)
+    for segment in segments:
+        combined_audio += segment + silence
+    return combined_audio
+
+def best_of(repeat, fn, *args):
+    """Run fn several times and return the fastest wall time in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark episode assembly strategies")
+    parser.add_argument("--line-seconds", type=float, default=4.0, help="Audio length per line")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+    
+    # The MP3 splice needs no ffmpeg once the silence frame is cached
+    silence_gap = b"\x00" * int(48000 / 8 * SILENCE_MS / 1000)
+    import src.tts as tts
+    tts.get_silence_mp3 = lambda duration_ms: silence_gap
+    
+    print(f"{'lines':>6} {'audio':>8} {'quadratic':>11} {'pcm join':>10} {'mp3 splice':>11} {'speedup':>8}")
+    for count in LINE_COUNTS:
+        segments = make_segments(count, args.line_seconds)
+        chunks = make_mp3_chunks(count, args.line_seconds)
+        
+        quadratic = best_of(args.repeat, assemble_quadratic, segments, SILENCE_MS)
+        linear = best_of(args.repeat, assemble_segments, segments, SILENCE_MS)
+        splice = best_of(args.repeat, concat_mp3_segments, chunks, SILENCE_MS)
+        
+        audio_minutes = count * (args.line_seconds + SILENCE_MS / 1000) / 60
+        print(f"{count:>6} {audio_minutes:>6.1f}m {quadratic:>10.3f}s {linear:>9.3f}s "
+              f"{splice:>10.4f}s {quadratic / linear:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
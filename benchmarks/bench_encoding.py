@@ -0,0 +1,46 @@
+"""
+Benchmark: output size and encode time for every export preset.
+
+Encodes the same episode (an existing audio file, or a synthetic tone) with
+each preset in EXPORT_PRESETS. Requires ffmpeg with libmp3lame and libopus.
+
+Usage:
+    python -m benchmarks.bench_encoding [--input episode.mp3] [--minutes 5]
+"""
+import argparse
+import os
+import tempfile
+from pydub import AudioSegment
+from pydub.generators import Sine
+from src.encoding import EXPORT_PRESETS, resolve_export, encode_audio
+
+def make_episode(minutes):
+    """A 24 kHz mono tone, roughly the shape of decoded edge-tts output."""
+    return Sine(220, sample_rate=24000).to_audio_segment(duration=minutes * 60 * 1000).set_channels(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark export presets")
+    parser.add_argument("--input", help="Audio file to encode (default: synthetic tone)")
+    parser.add_argument("--minutes", type=float, default=5.0, help="Length of the synthetic episode")
+    args = parser.parse_args()
+    
+    episode = AudioSegment.from_file(args.input) if args.input else make_episode(args.minutes)
+    print(f"Episode: {len(episode) / 60000:.1f} min\n")
+    print(f"{'preset':<14} {'bitrate':>8} {'size':>10} {'encode':>9} {'x realtime':>11}")
+    
+    for name in EXPORT_PRESETS:
+        preset = resolve_export(name, EXPORT_PRESETS[name]["bitrate"])
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{preset['extension']}") as tmp:
+            output_path = tmp.name
+        try:
+            info = encode_audio(episode, output_path, preset)
+            speed = info["duration_seconds"] / info["encode_seconds"] if info["encode_seconds"] else 0
+            print(f"{name:<14} {info['bitrate']:>8} {info['bytes'] / 1024:>8.0f}KB "
+                  f"{info['encode_seconds']:>8.2f}s {speed:>10.0f}x")
+        except Exception as e:
+            print(f"{name:<14} failed: {str(e)[:80]}")
+        finally:
+            os.remove(output_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: end-to-end latency of process_pdf -> compress_text ->
+generate_script -> create_podcast_audio, offline.
+
+Sample PDFs of several sizes are generated with pymupdf; Groq and edge-tts
+are replaced by the stand-ins in benchmarks/fakes.py, so the numbers show
+the pipeline's own overhead plus the simulated service latency. Reports
+p50/p95 per stage, throughput and peak RSS. Audio assembly and export
+need ffmpeg.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--runs 5] [--pages 3 15 60] [--lines 30]
+        [--llm-first-token 0.4] [--llm-tokens-per-second 250]
+        [--tts-handshake 0.25] [--tts-realtime 8] [--stream] [--fast-assembly]
+"""
+import argparse
+import io
+import math
+import os
+import sys
+import time
+import resource
+import statistics
+import pymupdf
+from benchmarks.fakes import FakeGroqSettings, FakeSpeechSettings, install_fakes
+from src.processing import process_pdf
+from src.compression import compress_text
+from src.generation import generate_script
+from src.tts import create_podcast_audio
+
+STAGES = ["extract", "compress", "script", "audio", "total"]
+
+PARAGRAPH = (
+    "Neural networks learn layered representations of their input. Each layer "
+    "transforms the previous one, and training adjusts the weights so that the "
+    "final layer predicts the target. Regularization, careful initialization and "
+    "enough data keep the model from memorizing the training set. "
+)
+
+def make_sample_pdf(pages):
+    """A PDF with a running header, page numbers, sections and a reference list."""
+    doc = pymupdf.open()
+    for number in range(1, pages + 1):
+        page = doc.new_page()
+        page.insert_text((72, 40), "Journal of Simulated Research - Vol. 1", fontsize=8)
+        page.insert_textbox(pymupdf.Rect(72, 70, 540, 760),
+                            f"Section {number}: Topic {number}\n\n" + PARAGRAPH * 6, fontsize=10)
+        page.insert_text((300, 800), str(number), fontsize=8)
+    page = doc.new_page()
+    page.insert_textbox(pymupdf.Rect(72, 70, 540, 760),
+                        "References\n\n" + "\n".join(f"[{i}] Author {i}. A paper. 2024." for i in range(1, 40)),
+                        fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def percentile(values, fraction):
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_once(pdf_bytes, args):
+    """Run the whole pipeline once; returns stage timings and output sizes."""
+    timings = {}
+    started = time.perf_counter()
+
+    stage = time.perf_counter()
+    data = process_pdf(io.BytesIO(pdf_bytes))
+    timings["extract"] = time.perf_counter() - stage
+    if data is None:
+        raise RuntimeError("PDF extraction failed; timings would be meaningless")
+
+    stage = time.perf_counter()
+    text, compression = compress_text(data["text"])
+    timings["compress"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    on_line = (lambda index, line: None) if args.stream else None
+    script = generate_script(text, on_line=on_line)
+    timings["script"] = time.perf_counter() - stage
+    if not script:
+        raise RuntimeError("Script generation failed; timings would be meaningless")
+
+    stage = time.perf_counter()
+    render_stats = {}
+    audio_file = create_podcast_audio(script, stats=render_stats, use_cache=False,
+                                      assembly="mp3" if args.fast_assembly else "pcm")
+    timings["audio"] = time.perf_counter() - stage
+    timings["total"] = time.perf_counter() - started
+    if not audio_file:
+        raise RuntimeError("Audio generation failed; timings would be meaningless")
+
+    if os.path.exists(audio_file):
+        os.remove(audio_file)
+    return timings, {
+        "lines": len(script),
+        "audio_ms": render_stats.get("audio_duration_ms", 0),
+        "tokens_before": compression["original_tokens"],
+        "tokens_after": compression["final_tokens"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF-to-podcast pipeline offline")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per sample PDF")
+    parser.add_argument("--pages", type=int, nargs="+", default=[3, 15, 60], help="Sample PDF sizes")
+    parser.add_argument("--lines", type=int, default=30, help="Dialogue lines per fake script")
+    parser.add_argument("--llm-first-token", type=float, default=0.4, help="Fake Groq latency before output (s)")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=250.0, help="Fake Groq output speed")
+    parser.add_argument("--tts-handshake", type=float, default=0.25, help="Fake edge-tts latency per request (s)")
+    parser.add_argument("--tts-realtime", type=float, default=8.0, help="Fake edge-tts audio seconds per second")
+    parser.add_argument("--stream", action="store_true", help="Stream the script generation")
+    parser.add_argument("--fast-assembly", action="store_true", help="Splice MP3 frames instead of PCM assembly")
+    args = parser.parse_args()
+
+    install_fakes(
+        FakeGroqSettings(first_token_seconds=args.llm_first_token, tokens_per_second=args.llm_tokens_per_second,
+                         lines=args.lines),
+        FakeSpeechSettings(handshake_seconds=args.tts_handshake, realtime_factor=args.tts_realtime),
+    )
+
+    print(f"{'pdf':>8} {'stage':>9} {'p50':>8} {'p95':>8}")
+    for pages in args.pages:
+        pdf_bytes = make_sample_pdf(pages)
+        results = [run_once(pdf_bytes, args) for _ in range(args.runs)]
+        label = f"{pages}p"
+        for stage in STAGES:
+            values = [timings[stage] for timings, _ in results]
+            print(f"{label:>8} {stage:>9} {percentile(values, 0.5):>7.3f}s {percentile(values, 0.95):>7.3f}s")
+            label = ""
+
+        totals = [timings["total"] for timings, _ in results]
+        outputs = [output for _, output in results]
+        audio_minutes = sum(output["audio_ms"] for output in outputs) / 60000
+        wall_minutes = sum(totals) / 60
+        print(f"{'':>8} {len(pdf_bytes) / 1024:.0f} KB PDF, ~{outputs[0]['tokens_before']:,} -> "
+              f"~{outputs[0]['tokens_after']:,} tokens, {outputs[0]['lines']} lines; "
+              f"{args.runs / wall_minutes:.1f} episodes/min, "
+              f"{audio_minutes / wall_minutes:.1f} audio min per wall min, "
+              f"mean {statistics.mean(totals):.2f}s\n")
+
+    print(f"Peak RSS: {peak_rss_mb():.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Offline stand-ins for the Groq chat API and edge-tts.
+
+Both simulate the services' latency and payload sizes without network
+access, so the pipeline can be benchmarked and exercised anywhere:
+
+    from benchmarks.fakes import install_fakes
+    install_fakes(FakeGroqSettings(first_token_seconds=0.3), FakeSpeechSettings())
+
+The fake Groq client answers chat.completions.create (plain and streamed)
+with a dialogue of the configured size; the fake speech stream yields
+silent MP3 frames in the edge-tts format plus word boundaries. FakeRedis
+is an in-memory Redis for the shared cache backend.
+"""
+import json
+import time
+import random
+import asyncio
+import fnmatch
+import threading
+from dataclasses import dataclass
+from types import SimpleNamespace
+from src.llm_client import set_client_factory
+from src.tts_client import set_speech_stream
+from src.rate_limit import configure_rate_limiter
+from src.cache import RedisCacheBackend, set_cache_backend
+
+# One silent MPEG-2 Layer III frame: 24 kHz mono 48 kbit/s (the edge-tts format),
+# 144 bytes = 24 ms. Zeroed side info decodes as silence.
+SILENT_FRAME = b"\xff\xf3\x64\xc0" + b"\x00" * 140
+FRAME_MS = 24
+
+@dataclass
+class FakeGroqSettings:
+    first_token_seconds: float = 0.4     # queueing + prompt processing
+    tokens_per_second: float = 250.0     # completion speed
+    lines: int = 30                      # dialogue lines per script
+    line_chars: int = 160                # characters per line
+    chars_per_token: int = 4
+    chunk_tokens: int = 8                # tokens per streamed chunk
+    jitter: float = 0.1                  # +/- fraction applied to latencies
+
+@dataclass
+class FakeSpeechSettings:
+    handshake_seconds: float = 0.25      # connect + first audio message
+    realtime_factor: float = 8.0         # audio seconds produced per wall second
+    chars_per_second: float = 15.0       # speaking rate that sets audio length
+    chunk_ms: int = 480                  # audio per streamed chunk
+    jitter: float = 0.1
+
+def _jittered(seconds, jitter):
+    return max(0.0, seconds * random.uniform(1 - jitter, 1 + jitter))
+
+def fake_dialogue(settings, speakers=("Siddharth", "Aditi")):
+    """A script of settings.lines lines of about settings.line_chars characters."""
+    sentence = "This is a simulated line of podcast dialogue about the document. "
+    text = (sentence * (settings.line_chars // len(sentence) + 1))[:settings.line_chars].strip()
+    return [{"speaker": speakers[index % 2], "text": text} for index in range(settings.lines)]
+
+class FakeStream:
+    """Async iterator of chunks that, like Groq's AsyncStream, must be closed."""
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __aiter__(self):
+        return self.chunks
+
+    async def close(self):
+        await self.chunks.aclose()
+
+class FakeCompletions:
+    """chat.completions with Groq's response shapes (message, stream chunks, usage)."""
+    def __init__(self, settings):
+        self.settings = settings
+
+    def _speakers(self, messages):
+        # The system prompt names both hosts as "hosts: A and B."
+        prompt = messages[0]["content"] if messages else ""
+        marker = "conversation script between two hosts: "
+        if marker in prompt:
+            names = prompt.split(marker, 1)[1].split(".", 1)[0].split(" and ")
+            if len(names) == 2:
+                return tuple(name.strip() for name in names)
+        return ("Siddharth", "Aditi")
+
+    async def create(self, model, messages, temperature=0.7, max_tokens=8000, stream=False, **kwargs):
+        settings = self.settings
+        content = json.dumps({"dialogue": fake_dialogue(settings, self._speakers(messages))})
+        content = content[:max_tokens * settings.chars_per_token]
+        finish_reason = "stop" if len(content) < max_tokens * settings.chars_per_token else "length"
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(message["content"]) for message in messages) // settings.chars_per_token,
+            completion_tokens=len(content) // settings.chars_per_token,
+        )
+        await asyncio.sleep(_jittered(settings.first_token_seconds, settings.jitter))
+
+        if stream:
+            return FakeStream(self._stream(content, usage, finish_reason))
+
+        await asyncio.sleep(_jittered(usage.completion_tokens / settings.tokens_per_second, settings.jitter))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=usage,
+        )
+
+    async def _stream(self, content, usage, finish_reason):
+        settings = self.settings
+        step = settings.chunk_tokens * settings.chars_per_token
+        delay = settings.chunk_tokens / settings.tokens_per_second
+        for start in range(0, len(content), step):
+            await asyncio.sleep(_jittered(delay, settings.jitter))
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=content[start:start + step]),
+                                         finish_reason=None)],
+                x_groq=None,
+            )
+        yield SimpleNamespace(
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason=finish_reason)],
+            x_groq=SimpleNamespace(usage=usage),
+        )
+
+class FakeGroq:
+    """Stand-in for AsyncGroq."""
+    def __init__(self, settings=None):
+        self.chat = SimpleNamespace(completions=FakeCompletions(settings or FakeGroqSettings()))
+
+    async def close(self):
+        pass
+
+def fake_speech_stream(settings=None):
+    """
+    Build a stream(text, voice, rate_str) replacement for edge-tts that yields
+    audio chunks (silent frames sized to the text) and word boundaries.
+    """
+    settings = settings or FakeSpeechSettings()
+
+    async def stream(text, voice, rate_str):
+        words = text.split()
+        audio_ms = max(FRAME_MS, len(text) / settings.chars_per_second * 1000)
+        frames = int(audio_ms // FRAME_MS)
+        await asyncio.sleep(_jittered(settings.handshake_seconds, settings.jitter))
+
+        # Word boundaries spread evenly over the audio, in 100 ns ticks
+        word_ticks = int(audio_ms * 10000 / max(1, len(words)))
+        for index, word in enumerate(words):
+            yield {"type": "WordBoundary", "offset": index * word_ticks, "duration": word_ticks, "text": word}
+
+        frames_per_chunk = max(1, settings.chunk_ms // FRAME_MS)
+        for start in range(0, frames, frames_per_chunk):
+            count = min(frames_per_chunk, frames - start)
+            await asyncio.sleep(_jittered(count * FRAME_MS / 1000 / settings.realtime_factor, settings.jitter))
+            yield {"type": "audio", "data": SILENT_FRAME * count}
+
+    return stream
+
+class FakeRedis:
+    """
+    The Redis commands RedisCacheBackend uses (HSET, HMGET, EXPIRE, DEL, SCAN),
+    in memory and thread-safe, returning bytes like redis-py. One instance
+    shared by several backends behaves like one server shared by replicas.
+    """
+    def __init__(self):
+        self.hashes = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _bytes(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    @staticmethod
+    def _decode(name):
+        return name.decode() if isinstance(name, bytes) else name
+
+    def _purge(self, name):
+        """Drop name if its TTL has passed. Caller holds the lock."""
+        if name in self.expires and self.expires[name] <= time.time():
+            self.hashes.pop(name, None)
+            del self.expires[name]
+
+    def hset(self, name, mapping):
+        with self.lock:
+            self._purge(name)
+            entry = dict(self.hashes.get(name, {}))
+            entry.update({key: self._bytes(value) for key, value in mapping.items()})
+            self.hashes[name] = entry   # replaced whole, like Redis's atomic HSET
+            return len(mapping)
+
+    def hmget(self, name, keys):
+        name = self._decode(name)
+        with self.lock:
+            self._purge(name)
+            entry = self.hashes.get(name, {})
+            return [entry.get(key) for key in keys]
+
+    def expire(self, name, seconds):
+        with self.lock:
+            if name not in self.hashes:
+                return False
+            self.expires[name] = time.time() + seconds
+            return True
+
+    def delete(self, *names):
+        with self.lock:
+            removed = 0
+            for name in map(self._decode, names):
+                removed += self.hashes.pop(name, None) is not None
+                self.expires.pop(name, None)
+            return removed
+
+    def scan_iter(self, match="*"):
+        with self.lock:
+            for name in list(self.hashes):
+                self._purge(name)
+            names = [name for name in self.hashes if fnmatch.fnmatchcase(name, match)]
+        for name in names:
+            yield name.encode()
+
+def install_fake_cache(client=None):
+    """Route the pipeline cache to a RedisCacheBackend on FakeRedis; returns the client."""
+    client = client or FakeRedis()
+    set_cache_backend(RedisCacheBackend(client))
+    return client
+
+def install_fakes(groq_settings=None, speech_settings=None):
+    """Route Groq and edge-tts calls to the stand-ins and lift the rate limits."""
+    set_client_factory(lambda: FakeGroq(groq_settings))
+    set_speech_stream(fake_speech_stream(speech_settings))
+    configure_rate_limiter(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9)
+
+def uninstall_fakes():
+    """Restore the real services and default rate limits."""
+    set_client_factory(None)
+    set_speech_stream(None)
+    configure_rate_limiter()
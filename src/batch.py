@@ -0,0 +1,259 @@
+"""
+Headless batch renderer: turns a folder of exported script JSON files into audio files.
+
+Usage:
+    python -m src.batch SCRIPTS_DIR OUTPUT_DIR [--workers 4] [--language English]
+
+Each script is rendered in its own worker process. Progress is kept in
+OUTPUT_DIR/.batch_state.json, so re-running the same command skips finished
+scripts and retries the ones that failed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from src.tts import create_podcast_audio, get_speaker_voices, VOICE_MAPPING, PACING_PRESETS, DEFAULT_MAX_CONCURRENCY
+from src.encoding import EXPORT_PRESETS, resolve_export
+
+STATE_FILE = ".batch_state.json"
+DEFAULT_WORKERS = 2
+
+def load_script(script_path):
+    """Load a script exported with "Export as JSON" (a list, or {"dialogue": [...]})."""
+    with open(script_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "dialogue" in data:
+        data = data["dialogue"]
+    if not isinstance(data, list):
+        raise ValueError("Script JSON must be a list of dialogue lines")
+    return data
+
+def hash_file(path):
+    """Generate MD5 hash of a file's contents."""
+    with open(path, 'rb') as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+def script_speakers(script_data):
+    """Return the first two distinct speakers in order of appearance."""
+    speakers = []
+    for line in script_data:
+        speaker = line.get("speaker", "Siddharth")
+        if speaker not in speakers:
+            speakers.append(speaker)
+    speakers += ["Siddharth", "Aditi"][len(speakers):]
+    return speakers[0], speakers[1]
+
+def render_script_file(script_path, output_path, options):
+    """
+    Render one script to output_path. Runs inside a worker process.
+    The MP3 only appears under its final name once it is complete.
+    """
+    started = time.perf_counter()
+    result = {"script": script_path, "output": output_path, "ok": False}
+    
+    try:
+        script_data = load_script(script_path)
+        speaker1, speaker2 = script_speakers(script_data)
+        render_stats = {}
+        
+        audio_file, timings = create_podcast_audio(
+            script_data,
+            language=options["language"],
+            pacing=options["pacing"],
+            silence_duration=options["silence"],
+            custom_speakers=get_speaker_voices(options["language"], speaker1, speaker2),
+            max_concurrency=options["max_concurrency"],
+            stats=render_stats,
+            assembly=options["assembly"],
+            return_timings=True,
+            plan=options["plan"],
+            audio_format=options["format"]
+        )
+        if not audio_file:
+            raise RuntimeError("Audio generation failed (see log above)")
+        
+        partial_path = output_path + ".part"
+        shutil.move(audio_file, partial_path)
+        os.replace(partial_path, output_path)
+        
+        result.update({
+            "ok": True,
+            "lines": sum(len(timing["lines"]) for timing in render_stats.get("line_timings", [])),
+            "bytes": os.path.getsize(output_path),
+            "audio_seconds": round(timings["total_duration_ms"] / 1000, 1),
+        })
+    except Exception as e:
+        result["error"] = str(e)[:500]
+    
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+def load_state(output_dir):
+    """Load batch progress from a previous run."""
+    state_path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Batch state load error: {e}")
+        return {}
+
+def save_state(output_dir, state):
+    """Save batch progress (write-then-rename so a crash never truncates it)."""
+    state_path = os.path.join(output_dir, STATE_FILE)
+    with open(state_path + ".tmp", 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(state_path + ".tmp", state_path)
+
+def render_directory(scripts_dir, output_dir, workers=DEFAULT_WORKERS, language="English",
+                     pacing="Normal (100%)", silence_duration=300,
+                     max_concurrency=DEFAULT_MAX_CONCURRENCY, assembly="pcm", plan=False,
+                     audio_format=None, force=False):
+    """
+    Render every *.json script in scripts_dir to an audio file in output_dir.
+    
+    Args:
+        scripts_dir: Folder of exported script JSON files
+        output_dir: Folder for the audio files and the batch state file
+        workers: Number of worker processes
+        language: Language for voice synthesis
+        pacing: Pacing preset from PACING_PRESETS
+        silence_duration: Pause between speakers (ms)
+        max_concurrency: Parallel edge-tts requests inside each worker
+        assembly: "pcm" or "mp3", see generate_full_audio
+        plan: Merge short lines and split long ones before synthesis
+        audio_format: Export preset (defaults to config.json audio.format)
+        force: Re-render scripts that already finished
+    
+    Returns:
+        Summary dict with rendered/skipped/failed counts and throughput
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state = load_state(output_dir)
+    options = {
+        "language": language,
+        "pacing": pacing,
+        "silence": silence_duration,
+        "max_concurrency": max_concurrency,
+        "assembly": assembly,
+        "plan": plan,
+        "format": resolve_export(audio_format)["name"],
+    }
+    extension = resolve_export(audio_format)["extension"]
+    
+    jobs = []
+    skipped = 0
+    for filename in sorted(os.listdir(scripts_dir)):
+        if not filename.endswith(".json"):
+            continue
+        script_path = os.path.join(scripts_dir, filename)
+        output_path = os.path.join(output_dir, f"{filename[:-len('.json')]}.{extension}")
+        script_hash = hash_file(script_path)
+        
+        previous = state.get(filename, {})
+        if (not force and previous.get("status") == "done" and previous.get("hash") == script_hash
+                and previous.get("options") == options and os.path.exists(output_path)):
+            skipped += 1
+            continue
+        jobs.append((filename, script_path, output_path, script_hash))
+    
+    print(f"Batch: {len(jobs)} to render, {skipped} already done, {workers} workers")
+    started = time.perf_counter()
+    rendered, failed, lines, total_bytes, audio_seconds = 0, 0, 0, 0, 0.0
+    
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(render_script_file, script_path, output_path, options): (filename, script_hash)
+            for filename, script_path, output_path, script_hash in jobs
+        }
+        for future in as_completed(futures):
+            filename, script_hash = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # worker process died
+                result = {"ok": False, "error": str(e)[:500], "seconds": 0}
+            
+            entry = {
+                "hash": script_hash,
+                "options": options,
+                "seconds": result["seconds"],
+                "timestamp": datetime.now().isoformat()
+            }
+            if result["ok"]:
+                rendered += 1
+                lines += result["lines"]
+                total_bytes += result["bytes"]
+                audio_seconds += result["audio_seconds"]
+                entry["status"] = "done"
+                print(f"✅ {filename}: {result['lines']} lines, {result['audio_seconds']:.0f}s of audio "
+                      f"in {result['seconds']:.1f}s")
+            else:
+                failed += 1
+                entry["status"] = "failed"
+                entry["error"] = result["error"]
+                entry["attempts"] = state.get(filename, {}).get("attempts", 0) + 1
+                print(f"❌ {filename}: {result['error']}")
+            
+            state[filename] = entry
+            save_state(output_dir, state)
+    
+    elapsed = time.perf_counter() - started
+    summary = {
+        "rendered": rendered,
+        "skipped": skipped,
+        "failed": failed,
+        "seconds": round(elapsed, 2),
+        "scripts_per_minute": round(rendered / elapsed * 60, 2) if elapsed > 0 else 0,
+        "lines_per_second": round(lines / elapsed, 2) if elapsed > 0 else 0,
+        "output_megabytes": round(total_bytes / (1024 * 1024), 2),
+        "audio_minutes": round(audio_seconds / 60, 1),
+        "realtime_factor": round(audio_seconds / elapsed, 1) if elapsed > 0 else 0,
+    }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Render exported AudioLearn scripts to MP3 without the UI")
+    parser.add_argument("scripts_dir", help="Folder of script JSON files")
+    parser.add_argument("output_dir", help="Folder for the rendered MP3s")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes")
+    parser.add_argument("--language", default="English", choices=list(VOICE_MAPPING.keys()))
+    parser.add_argument("--pacing", default="Normal (100%)", choices=list(PACING_PRESETS.keys()))
+    parser.add_argument("--silence", type=int, default=300, help="Pause between speakers (ms)")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Parallel voice requests per script")
+    parser.add_argument("--fast-assembly", action="store_true", help="Splice MP3 frames, no re-encode")
+    parser.add_argument("--format", choices=list(EXPORT_PRESETS.keys()),
+                        help="Output preset (default: audio.format in config.json)")
+    parser.add_argument("--plan", action="store_true", help="Merge short lines and split long ones")
+    parser.add_argument("--force", action="store_true", help="Re-render scripts that already finished")
+    args = parser.parse_args()
+    
+    summary = render_directory(
+        args.scripts_dir,
+        args.output_dir,
+        workers=args.workers,
+        language=args.language,
+        pacing=args.pacing,
+        silence_duration=args.silence,
+        max_concurrency=args.max_concurrency,
+        assembly="mp3" if args.fast_assembly else "pcm",
+        plan=args.plan,
+        audio_format=args.format,
+        force=args.force
+    )
+    
+    print("\n📊 Batch summary")
+    print(f"  Rendered: {summary['rendered']}  Skipped: {summary['skipped']}  Failed: {summary['failed']}")
+    print(f"  Wall time: {summary['seconds']}s  ({summary['scripts_per_minute']} scripts/min, "
+          f"{summary['lines_per_second']} lines/s, {summary['output_megabytes']} MB)")
+    print(f"  Audio: {summary['audio_minutes']} min rendered at {summary['realtime_factor']}x realtime")
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,56 @@
+"""
+Pipeline cache: extracted markdown, scripts, translations and rendered audio.
+
+Entries live in a pluggable backend. DiskCacheBackend (the default) keeps a
+SQLite index next to the payload files and is safe for several processes
+sharing one local volume: payloads are written to a temporary file and
+renamed into place under a fresh version name, so readers never see a
+partial file, and eviction or clear_cache only remove the versions they
+dropped from the index. RedisCacheBackend stores entries in any
+Redis-compatible server so replicas on different hosts share hits.
+"""
 import os
 import json
+import time
+import uuid
+import sqlite3
 import hashlib
-from datetime import datetime, timedelta
+import tempfile
+import threading
+from src.config import get_setting
+
+CACHE_DIR = get_setting("cache", "directory", ".audiolearn_cache")
+CACHE_MAX_BYTES = int(get_setting("cache", "max_megabytes", 512) * 1024 * 1024)
+CACHE_BACKEND = get_setting("cache", "backend", "disk")   # "disk" or "redis"
+REDIS_URL = get_setting("cache", "redis_url", "redis://localhost:6379/0")
+MAX_AGE_DAYS = get_setting("cache", "max_age_days", 7)
+
+# Pipeline stages, each keyed by a hash of everything upstream of it:
+# PDF bytes -> markdown, text + generation settings -> script (and its
+# translations), script + voice settings -> audio (and its timeline)
+STAGES = ("markdown", "script", "translation", "audio", "timeline")
 
-CACHE_DIR = ".audiolearn_cache"
+# Bump when the table layout changes; an index with another version is rebuilt
+SCHEMA_VERSION = 3
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        stage TEXT NOT NULL,
+        version TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL,
+        metadata TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)",
+    "CREATE INDEX IF NOT EXISTS entries_created ON entries (created)",
+    "CREATE INDEX IF NOT EXISTS entries_stage ON entries (stage)",
+]
 
-def ensure_cache_dir():
-    """Create cache directory if it doesn't exist."""
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
+def make_key(stage, *parts):
+    """Content-addressed key for one pipeline stage from its upstream hash and settings."""
+    combined = "\x00".join([stage] + [str(part) for part in parts])
+    return hashlib.sha256(combined.encode()).hexdigest()
 
 def get_cache_key(text_hash, speaker1, speaker2, tone):
     """Generate a unique cache key based on input parameters."""
@@ -16,67 +58,492 @@ def get_cache_key(text_hash, speaker1, speaker2, tone):
     return hashlib.md5(combined.encode()).hexdigest()
 
 def hash_text(text):
-    """Generate MD5 hash of text content."""
-    return hashlib.md5(text[:10000].encode()).hexdigest()  # Use first 10k chars
+    """Generate SHA-256 hash of the whole text."""
+    return hashlib.sha256(text.encode()).hexdigest()
 
-def save_to_cache(script_data, cache_key, metadata=None):
-    """Save generated script to cache."""
-    ensure_cache_dir()
-    cache_path = os.path.join(CACHE_DIR, f"{cache_key}.json")
-    
-    cache_entry = {
-        "script": script_data,
-        "timestamp": datetime.now().isoformat(),
-        "metadata": metadata or {}
-    }
+def hash_bytes(data):
+    """Generate SHA-256 hash of raw bytes (e.g. an uploaded PDF)."""
+    return hashlib.sha256(data).hexdigest()
+
+def hash_script(script):
+    """Hash of a dialogue script, independent of how it was loaded."""
+    return hash_text(json.dumps(script, sort_keys=True, ensure_ascii=False))
+
+def get_markdown_key(pdf_bytes):
+    """Key for the markdown extracted from a PDF."""
+    return make_key("markdown", hash_bytes(pdf_bytes))
+
+def get_script_key(text, model, tone, speaker1, speaker2):
+    """Key for a script generated from the full (compressed) text with these settings."""
+    return make_key("script", hash_text(text), model, tone, speaker1, speaker2)
+
+def get_translation_key(script, language, model):
+    """Key for a script translated into language by model."""
+    return make_key("translation", hash_script(script), language, model)
+
+def get_audio_key(script, language, custom_speakers, pacing, silence_duration, audio_format, plan=False,
+                  assembly="pcm"):
+    """
+    Key for the rendered episode of a script.
     
+    Args:
+        script: Dialogue script
+        custom_speakers: Speaker-to-voice mapping used for the render
+        audio_format: Resolved export preset and bitrate, e.g. "mp3@64k"
+        assembly: "pcm" or "mp3"; the mp3 splice keeps the voices' own bitrate
+                  instead of encoding at audio_format's
+        Other arguments as for create_podcast_audio
+    """
+    voices = json.dumps(custom_speakers or {}, sort_keys=True)
+    return make_key("audio", hash_script(script), language, voices, pacing, silence_duration, audio_format, plan,
+                    assembly)
+
+class DiskCacheBackend:
+    """
+    SQLite index (key, stage, payload version, size, timestamps) plus one
+    payload file per entry version. Lookups are primary-key queries and
+    expiry / LRU eviction by total bytes only touch the index.
+
+    WAL mode needs the processes to share memory-mapped files, so replicas
+    on different hosts (e.g. an NFS volume) should use RedisCacheBackend.
+    """
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, "index.sqlite3")
+        self.payload_dir = os.path.join(directory, "payloads")
+        self.local = threading.local()
+
+    def connect(self):
+        """
+        One connection per thread, created (and the index migrated to the
+        current layout) on first use. WAL mode lets readers run alongside a writer.
+        """
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            return conn
+        os.makedirs(self.payload_dir, exist_ok=True)
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Only one process checks and rebuilds the layout at a time
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # New or older layout: start over rather than guess at old payloads
+                conn.execute("DROP TABLE IF EXISTS entries")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                self.remove_legacy_payloads()
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            conn.close()
+            raise
+        self.local.conn = conn
+        return conn
+
+    def payload_path(self, cache_key, version):
+        """Payloads are spread over 256 subdirectories to keep directories small."""
+        return os.path.join(self.payload_dir, cache_key[:2], f"{cache_key}.{version}")
+
+    def remove_payloads(self, victims):
+        """Delete the payload files of (key, version) pairs already dropped from the index."""
+        for key, version in victims:
+            try:
+                os.remove(self.payload_path(key, version))
+            except FileNotFoundError:
+                pass
+
+    def read(self, cache_key, stage, max_age_days):
+        """
+        Returns:
+            Tuple of (status, payload bytes, metadata); status is "hit",
+            "miss" or "expired" and only a hit carries a payload
+        """
+        conn = self.connect()
+        row = conn.execute("SELECT version, created, metadata FROM entries WHERE key = ? AND stage = ?",
+                           (cache_key, stage)).fetchone()
+        if row is None:
+            return "miss", None, None
+        version, created, metadata = row
+        if time.time() - created > max_age_days * 86400:
+            return "expired", None, None
+        try:
+            with open(self.payload_path(cache_key, version), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            # Replaced or evicted by another process since the lookup
+            return "miss", None, None
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ? AND version = ?",
+                     (time.time(), cache_key, version))
+        return "hit", data, json.loads(metadata or "{}")
+
+    def lookup(self, cache_key, stage, max_age_days):
+        """"hit", "miss" or "expired" from the index alone, without reading the payload."""
+        row = self.connect().execute("SELECT created FROM entries WHERE key = ? AND stage = ?",
+                                     (cache_key, stage)).fetchone()
+        if row is None:
+            return "miss"
+        return "hit" if time.time() - row[0] <= max_age_days * 86400 else "expired"
+
+    def write(self, cache_key, stage, data, metadata=None):
+        """
+        Writes the payload under a new version name (temp file + rename), then
+        points the index at it; the replaced version and any entries evicted
+        to stay under max_bytes are deleted after the index commits.
+        """
+        conn = self.connect()
+        version = uuid.uuid4().hex[:12]
+        path = self.payload_path(cache_key, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            replaced = conn.execute("SELECT key, version FROM entries WHERE key = ?", (cache_key,)).fetchall()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, stage, version, size, created, accessed, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, stage, version, len(data), now, now, json.dumps(metadata or {}))
+            )
+            victims = self.evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            self.remove_payloads([(cache_key, version)])
+            raise
+        self.remove_payloads(replaced + victims)
+
+    def evict(self, conn, max_bytes=None):
+        """
+        Drops least recently used entries from the index until the payloads fit
+        in max_bytes. Runs inside the caller's transaction.
+
+        Returns:
+            List of (key, version) whose payload files the caller should delete
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= max_bytes:
+            return []
+        victims = []
+        for key, version, size in conn.execute("SELECT key, version, size FROM entries ORDER BY accessed"):
+            if total <= max_bytes:
+                break
+            victims.append((key, version))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ? AND version = ?", victims)
+        return victims
+
+    def delete_where(self, condition="", params=()):
+        """Drops matching entries from the index, then deletes their payloads."""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            victims = conn.execute(f"SELECT key, version FROM entries {condition}", params).fetchall()
+            conn.executemany("DELETE FROM entries WHERE key = ? AND version = ?", victims)
+            victims += self.evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.remove_payloads(victims)
+        return len(victims)
+
+    def cleanup(self, days):
+        """Removes entries older than days (and trims to max_bytes) using only the index."""
+        return self.delete_where("WHERE created < ?", (time.time() - days * 86400,))
+
+    def clear(self):
+        """
+        Removes every entry. Entries leave the index first, so concurrent
+        readers see clean misses instead of half-deleted files.
+        """
+        return self.delete_where()
+
+    def info(self):
+        """Rows of (stage, entries, bytes) from the index."""
+        return self.connect().execute(
+            "SELECT stage, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY stage").fetchall()
+
+    def remove_legacy_payloads(self):
+        """
+        Delete payloads written by older cache layouts: one JSON file per key in
+        the cache directory, keyed by a hash of only the first 10k characters,
+        and payloads of a previous index. None of them can be looked up any more.
+        """
+        for filename in os.listdir(self.directory):
+            filepath = os.path.join(self.directory, filename)
+            if filename.endswith(".json") and os.path.isfile(filepath):
+                os.remove(filepath)
+        if os.path.exists(self.payload_dir):
+            import shutil
+            shutil.rmtree(self.payload_dir)
+        os.makedirs(self.payload_dir, exist_ok=True)
+
+class RedisCacheBackend:
+    """
+    Entries as Redis hashes (data, stage, size, created) under prefix, using
+    only HSET/HMGET/EXPIRE/DEL/SCAN so any Redis-compatible server (or the
+    in-memory stand-in in benchmarks/fakes.py) works. Each write is a single
+    HSET, so readers see either the old or the new entry. Entries expire
+    after max_age_days; the size bound is the server's maxmemory policy
+    (use allkeys-lru), so max_bytes is None unless given for display.
+    """
+    def __init__(self, client, prefix="audiolearn:cache:", max_age_days=MAX_AGE_DAYS, max_bytes=None):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = int(max_age_days * 86400)
+        self.max_bytes = max_bytes
+
+    def read(self, cache_key, stage, max_age_days):
+        data, entry_stage, created, metadata = self.client.hmget(
+            self.prefix + cache_key, ["data", "stage", "created", "metadata"])
+        if data is None or entry_stage is None or entry_stage.decode() != stage:
+            return "miss", None, None
+        if time.time() - float(created) > max_age_days * 86400:
+            return "expired", None, None
+        return "hit", data, json.loads(metadata or b"{}")
+
+    def lookup(self, cache_key, stage, max_age_days):
+        entry_stage, created = self.client.hmget(self.prefix + cache_key, ["stage", "created"])
+        if entry_stage is None or entry_stage.decode() != stage:
+            return "miss"
+        return "hit" if time.time() - float(created) <= max_age_days * 86400 else "expired"
+
+    def write(self, cache_key, stage, data, metadata=None):
+        name = self.prefix + cache_key
+        self.client.hset(name, mapping={
+            "data": data, "stage": stage, "size": len(data),
+            "created": time.time(), "metadata": json.dumps(metadata or {})
+        })
+        self.client.expire(name, self.ttl)
+
+    def entries(self):
+        """Yields (name, stage, size, created) for every entry under the prefix."""
+        for name in self.client.scan_iter(match=self.prefix + "*"):
+            stage, size, created = self.client.hmget(name, ["stage", "size", "created"])
+            if stage is not None:
+                yield name, stage.decode(), int(size), float(created)
+
+    def cleanup(self, days):
+        cutoff = time.time() - days * 86400
+        expired = [name for name, _, _, created in self.entries() if created < cutoff]
+        if expired:
+            self.client.delete(*expired)
+        return len(expired)
+
+    def clear(self):
+        """Deletes only this cache's keys, never the whole database."""
+        names = list(self.client.scan_iter(match=self.prefix + "*"))
+        if names:
+            self.client.delete(*names)
+        return len(names)
+
+    def info(self):
+        totals = {}
+        for _, stage, size, _ in self.entries():
+            count, total = totals.get(stage, (0, 0))
+            totals[stage] = (count + 1, total + size)
+        return [(stage, count, total) for stage, (count, total) in totals.items()]
+
+_backend = None
+_backend_lock = threading.Lock()
+
+# Per-stage counters since the process started (all sessions share them)
+METRIC_FIELDS = ("hits", "misses", "expired", "errors", "writes", "bytes_read", "bytes_written",
+                 "tokens_saved", "lookups", "lookup_seconds", "max_lookup_seconds")
+LOOKUP_COUNTERS = {"hit": "hits", "miss": "misses", "expired": "expired", "error": "errors"}
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def create_backend():
+    """Backend from config.json (cache.backend, cache.redis_url)."""
+    if CACHE_BACKEND == "redis":
+        try:
+            import redis
+            return RedisCacheBackend(redis.Redis.from_url(REDIS_URL))
+        except ImportError:
+            print("Cache backend 'redis' needs the redis package (pip install redis); using the local disk cache")
+    return DiskCacheBackend()
+
+def get_cache_backend():
+    """The process-wide cache backend, created from config.json on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
+
+def set_cache_backend(backend=None):
+    """
+    Route the cache to another backend (e.g. a RedisCacheBackend around a
+    stand-in client); None goes back to the one configured in config.json.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def record_metric(stage, **counts):
+    """Add counts to a stage's metrics; lookup_seconds also updates the maximum."""
+    with _metrics_lock:
+        metrics = _metrics.setdefault(stage, dict.fromkeys(METRIC_FIELDS, 0))
+        for name, value in counts.items():
+            metrics[name] += value
+        if "lookup_seconds" in counts:
+            metrics["lookups"] += 1
+            metrics["max_lookup_seconds"] = max(metrics["max_lookup_seconds"], counts["lookup_seconds"])
+
+def record_lookup(stage, status, started, data=None, metadata=None):
+    """Count one lookup outcome ("hit", "miss", "expired" or "error") and its latency."""
+    counts = {LOOKUP_COUNTERS[status]: 1}
+    if data is not None:
+        counts["bytes_read"] = len(data)
+    if metadata:
+        # Generation stages store the tokens they cost; a hit saves them again
+        counts["tokens_saved"] = metadata.get("tokens", 0)
+    record_metric(stage, lookup_seconds=time.perf_counter() - started, **counts)
+
+def get_cache_metrics():
+    """
+    Hit/miss/expiry/error counts, bytes read and written, LLM tokens saved
+    and lookup latency per cache stage, plus a "total" over all stages.
+
+    Returns:
+        Dict of stage -> metrics, each with hit_rate, avg_lookup_ms and
+        max_lookup_ms derived from the raw counters
+    """
+    with _metrics_lock:
+        stages = {stage: dict(metrics) for stage, metrics in _metrics.items()}
+    total = dict.fromkeys(METRIC_FIELDS, 0)
+    for metrics in stages.values():
+        for name in METRIC_FIELDS:
+            if name == "max_lookup_seconds":
+                total[name] = max(total[name], metrics[name])
+            else:
+                total[name] += metrics[name]
+    stages["total"] = total
+    for metrics in stages.values():
+        answered = metrics["hits"] + metrics["misses"] + metrics["expired"]
+        metrics["hit_rate"] = round(metrics["hits"] / answered, 3) if answered else 0.0
+        metrics["avg_lookup_ms"] = round(metrics["lookup_seconds"] / metrics["lookups"] * 1000, 2) if metrics["lookups"] else 0.0
+        metrics["max_lookup_ms"] = round(metrics.pop("max_lookup_seconds") * 1000, 2)
+        metrics["lookup_seconds"] = round(metrics["lookup_seconds"], 3)
+    return stages
+
+def reset_cache_metrics():
+    """Start counting from zero (e.g. between benchmark runs)."""
+    with _metrics_lock:
+        _metrics.clear()
+
+def save_bytes_to_cache(data, cache_key, metadata=None, stage="audio"):
+    """Save raw bytes (e.g. a rendered episode) to cache."""
     try:
-        with open(cache_path, 'w') as f:
-            json.dump(cache_entry, f, indent=2)
+        get_cache_backend().write(cache_key, stage, data, metadata)
+        record_metric(stage, writes=1, bytes_written=len(data))
         return True
     except Exception as e:
         print(f"Cache save error: {e}")
+        record_metric(stage, errors=1)
         return False
 
-def get_from_cache(cache_key, max_age_days=7):
-    """Retrieve script from cache if it exists and is fresh."""
-    cache_path = os.path.join(CACHE_DIR, f"{cache_key}.json")
-    
-    if not os.path.exists(cache_path):
-        return None
-    
+def read_from_cache(cache_key, max_age_days, stage, decode=None):
+    """
+    Read an entry and count the lookup once. A payload that fails to read or
+    to decode counts as an "error" (not a hit) and gives None.
+    """
+    started = time.perf_counter()
     try:
-        with open(cache_path, 'r') as f:
-            cache_entry = json.load(f)
-        
-        timestamp = datetime.fromisoformat(cache_entry["timestamp"])
-        if datetime.now() - timestamp > timedelta(days=max_age_days):
-            return None
-        
-        return cache_entry["script"]
+        status, data, metadata = get_cache_backend().read(cache_key, stage, max_age_days)
+        value = decode(data) if decode and data is not None else data
     except Exception as e:
         print(f"Cache retrieval error: {e}")
+        record_lookup(stage, "error", started)
         return None
+    record_lookup(stage, status, started, data, metadata)
+    return value
+
+def get_bytes_from_cache(cache_key, max_age_days=7, stage="audio"):
+    """Retrieve raw bytes from cache if they exist and are fresh."""
+    return read_from_cache(cache_key, max_age_days, stage)
+
+def is_cached(cache_key, max_age_days=7, stage="script"):
+    """True if a fresh entry exists, without reading its payload."""
+    started = time.perf_counter()
+    try:
+        status = get_cache_backend().lookup(cache_key, stage, max_age_days)
+    except Exception as e:
+        print(f"Cache retrieval error: {e}")
+        record_lookup(stage, "error", started)
+        return False
+    record_lookup(stage, status, started)
+    return status == "hit"
+
+def save_to_cache(script_data, cache_key, metadata=None, stage="script"):
+    """Save generated script (or any JSON value) to cache."""
+    return save_bytes_to_cache(json.dumps(script_data).encode(), cache_key, metadata, stage)
+
+def get_from_cache(cache_key, max_age_days=7, stage="script"):
+    """Retrieve script (or any JSON value) from cache if it exists and is fresh."""
+    return read_from_cache(cache_key, max_age_days, stage, json.loads)
+
+def save_audio_to_cache(audio_key, audio_file, timings=None, metadata=None):
+    """Store a rendered episode and its timeline (for subtitles) under audio_key."""
+    with open(audio_file, 'rb') as f:
+        saved = save_bytes_to_cache(f.read(), audio_key, metadata, stage="audio")
+    if saved and timings is not None:
+        saved = save_to_cache(timings, make_key("timeline", audio_key), stage="timeline")
+    return saved
+
+def get_audio_from_cache(audio_key, extension="mp3", max_age_days=7):
+    """
+    Restore a cached episode into a temporary file.
+    
+    Returns:
+        Tuple of (audio path, timeline or None), or (None, None) on a miss
+    """
+    data = get_bytes_from_cache(audio_key, max_age_days, stage="audio")
+    if data is None:
+        return None, None
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{extension}", mode='wb') as audio_out:
+        audio_out.write(data)
+    timings = get_from_cache(make_key("timeline", audio_key), max_age_days, stage="timeline")
+    return audio_out.name, timings
+
+def get_cache_info():
+    """
+    Number of entries and total payload bytes (overall and per stage), and
+    the active backend's size limit (None when the server enforces it).
+    """
+    backend = get_cache_backend()
+    rows = backend.info()
+    return {
+        "entries": sum(count for _, count, _ in rows),
+        "bytes": sum(size for _, _, size in rows),
+        "max_bytes": backend.max_bytes,
+        "stages": {stage: {"entries": count, "bytes": size} for stage, count, size in rows}
+    }
 
 def clear_cache():
-    """Clear all cached files."""
-    if os.path.exists(CACHE_DIR):
-        import shutil
-        shutil.rmtree(CACHE_DIR)
-        ensure_cache_dir()
+    """Clear all cached entries (safe while other processes are reading)."""
+    try:
+        get_cache_backend().clear()
+    except Exception as e:
+        print(f"Cache clear error: {e}")
 
 def cleanup_old_cache(days=7):
-    """Remove cache entries older than specified days."""
-    ensure_cache_dir()
-    cutoff_time = datetime.now() - timedelta(days=days)
-    
-    for filename in os.listdir(CACHE_DIR):
-        filepath = os.path.join(CACHE_DIR, filename)
-        try:
-            with open(filepath, 'r') as f:
-                cache_entry = json.load(f)
-            timestamp = datetime.fromisoformat(cache_entry["timestamp"])
-            if timestamp < cutoff_time:
-                os.remove(filepath)
-        except Exception as e:
-            print(f"Cache cleanup error for {filename}: {e}")
+    """Remove cache entries older than specified days (reads only the index)."""
+    try:
+        get_cache_backend().cleanup(days)
+    except Exception as e:
+        print(f"Cache cleanup error: {e}")
@@ -0,0 +1,201 @@
+"""
+Input compression between process_pdf and generate_script.
+
+Markdown from pymupdf4llm carries a lot the hosts never talk about: reference
+lists, page headers and footers repeated on every page, page numbers, image
+placeholders and very long tables. compress_text drops those blocks, then
+trims what is left to a token budget so the prompt stays small.
+"""
+import re
+from collections import Counter
+from src.config import get_setting
+
+# Token estimate: ~4 characters per token for English prose on Llama-style tokenizers
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = get_setting("api", "token_budget", 15000)
+
+# Low-value block detection
+TABLE_MAX_ROWS = 12            # rows kept from a long table (plus its header)
+FURNITURE_MIN_REPEATS = 3      # short lines seen this often are page headers/footers
+FURNITURE_MAX_CHARS = 80
+DROP_SECTIONS = re.compile(
+    r'^(references|bibliography|works cited|literature cited|acknowledg(e)?ments?|'
+    r'appendix|appendices|supplementary material|about the authors?)\b',
+    re.IGNORECASE
+)
+HEADING = re.compile(r'^(#{1,6})\s+(.*)$')
+# Bare numbers stop at three digits so a year on its own line is kept
+PAGE_NUMBER = re.compile(r'^\s*(page\s+\d+|\d{1,3})(\s+(of|/)\s+\d+)?\s*$', re.IGNORECASE)
+PAGE_BREAK = re.compile(r'^-{5,}$')
+IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)|\*\*==> picture .*? <==\*\*|^-{5,}$')
+# Markers must not follow a word or bracket, so indexing like a[0] is left alone
+CITATION = re.compile(r'\s?(?<![\w\[\]])\[(\d+(?:[-–,]\s?\d+)*)\](?!\()')
+CODE_FENCE = re.compile(r'^\s*(```|~~~)')
+
+def estimate_tokens(text):
+    """Rough token count for budgeting (no tokenizer dependency)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def code_lines(lines):
+    """Flags the lines inside fenced code blocks (fences included)."""
+    flags = []
+    in_code = False
+    for line in lines:
+        fence = bool(CODE_FENCE.match(line))
+        flags.append(in_code or fence)
+        if fence:
+            in_code = not in_code
+    return flags
+
+def at_page_boundary(lines, index, repeated):
+    """
+    True when the nearest text above or below the line is a page break, a page
+    number or the document edge (skipping other repeated lines, so a header
+    block of several lines counts as a whole).
+    """
+    for step in (-1, 1):
+        position = index + step
+        while 0 <= position < len(lines):
+            stripped = lines[position].strip()
+            if stripped and stripped not in repeated:
+                break
+            position += step
+        else:
+            return True
+        if PAGE_BREAK.match(stripped) or PAGE_NUMBER.fullmatch(stripped):
+            return True
+    return False
+
+def strip_furniture(lines, removed):
+    """
+    Drops page numbers, image placeholders and short lines repeated on many
+    pages next to a page break. Fenced code blocks are left untouched.
+    """
+    in_code = code_lines(lines)
+    counts = Counter(line.strip() for line, code in zip(lines, in_code)
+                     if not code and line.strip() and len(line.strip()) <= FURNITURE_MAX_CHARS
+                     and not HEADING.match(line) and not line.lstrip().startswith("|"))
+    repeated = {line for line, count in counts.items() if count >= FURNITURE_MIN_REPEATS}
+
+    kept = []
+    for index, line in enumerate(lines):
+        if in_code[index]:
+            kept.append(line)
+            continue
+        stripped = line.strip()
+        if ((stripped in repeated and at_page_boundary(lines, index, repeated))
+                or PAGE_NUMBER.fullmatch(stripped) or (stripped and IMAGE.fullmatch(stripped))):
+            removed["furniture"] += len(line) + 1
+            continue
+        kept.append(IMAGE.sub("", line))
+    return kept
+
+def strip_sections(lines, removed):
+    """Drops reference lists and similar back matter up to the next heading of the same level."""
+    kept = []
+    dropping_level = None
+    for line in lines:
+        heading = HEADING.match(line)
+        title = heading.group(2).strip("*_ ").lstrip("0123456789. ") if heading else ""
+        if heading and dropping_level is not None and len(heading.group(1)) <= dropping_level:
+            dropping_level = None
+        if heading and DROP_SECTIONS.match(title):
+            dropping_level = len(heading.group(1))
+        if dropping_level is not None:
+            removed["references"] += len(line) + 1
+            continue
+        kept.append(line)
+    return kept
+
+def shrink_tables(lines, removed):
+    """Keeps the header and first TABLE_MAX_ROWS rows of every markdown table."""
+    kept = []
+    table = []
+
+    def flush():
+        if len(table) > TABLE_MAX_ROWS + 2:
+            kept.extend(table[:TABLE_MAX_ROWS + 2])
+            dropped = table[TABLE_MAX_ROWS + 2:]
+            removed["tables"] += sum(len(row) + 1 for row in dropped)
+            kept.append(f"[table shortened: {len(dropped)} more rows]")
+        else:
+            kept.extend(table)
+        table.clear()
+
+    for line in lines:
+        if line.lstrip().startswith("|"):
+            table.append(line)
+            continue
+        if table:
+            flush()
+        kept.append(line)
+    if table:
+        flush()
+    return kept
+
+def fit_to_budget(text, token_budget):
+    """
+    Trims text to token_budget, taking the same share from every section so
+    the whole document stays represented (each section is cut at a paragraph
+    boundary where possible).
+    """
+    max_chars = token_budget * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    sections = re.split(r'\n(?=#{1,6}\s)', text)
+    ratio = max_chars / len(text)
+    trimmed = []
+    for section in sections:
+        allowance = int(len(section) * ratio)
+        if len(section) <= allowance:
+            trimmed.append(section)
+            continue
+        cut = section.rfind("\n\n", 0, allowance)
+        if cut < allowance // 2:
+            cut = section.rfind(". ", 0, allowance) + 1 or allowance
+        trimmed.append(section[:cut].rstrip())
+    return "\n".join(part for part in trimmed if part.strip())[:max_chars]
+
+def compress_text(text, token_budget=DEFAULT_TOKEN_BUDGET, drop_citations=True):
+    """
+    Strips low-value blocks from extracted markdown and fits it to a token budget.
+
+    Args:
+        text: Markdown from process_pdf
+        token_budget: Maximum estimated tokens to keep, or None for no trimming
+        drop_citations: Remove inline numeric citation markers like [12] or [3-5]
+
+    Returns:
+        Tuple of (compressed text, report) where report has original_tokens,
+        cleaned_tokens, final_tokens and the characters removed per category
+    """
+    removed = {"furniture": 0, "references": 0, "tables": 0, "citations": 0, "whitespace": 0, "budget": 0}
+
+    lines = text.splitlines()
+    lines = strip_furniture(lines, removed)
+    lines = strip_sections(lines, removed)
+    lines = shrink_tables(lines, removed)
+
+    if drop_citations:
+        before = sum(len(line) for line in lines)
+        lines = [line if code else CITATION.sub("", line) for line, code in zip(lines, code_lines(lines))]
+        removed["citations"] = before - sum(len(line) for line in lines)
+    cleaned = "\n".join(lines)
+
+    collapsed = re.sub(r'[ \t]+\n', '\n', cleaned)
+    collapsed = re.sub(r'\n{3,}', '\n\n', collapsed).strip()
+    removed["whitespace"] = len(cleaned) - len(collapsed)
+    cleaned = collapsed
+
+    final = fit_to_budget(cleaned, token_budget) if token_budget else cleaned
+    removed["budget"] = len(cleaned) - len(final)
+
+    report = {
+        "original_tokens": estimate_tokens(text),
+        "cleaned_tokens": estimate_tokens(cleaned),
+        "final_tokens": estimate_tokens(final),
+        "token_budget": token_budget,
+        "removed_chars": removed,
+    }
+    return final, report
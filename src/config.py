@@ -0,0 +1,19 @@
+import os
+import json
+from functools import lru_cache
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+
+@lru_cache(maxsize=1)
+def load_config():
+    """Load config.json once per process. Returns an empty dict if it is missing or invalid."""
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Config load error: {e}")
+        return {}
+
+def get_setting(section, key, default=None):
+    """Read one value from a config.json section, falling back to default."""
+    return load_config().get(section, {}).get(key, default)
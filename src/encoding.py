@@ -0,0 +1,96 @@
+import io
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pydub import AudioSegment
+from src.config import get_setting
+
+# Output presets: ffmpeg muxer, codec, default bitrate and extra arguments
+EXPORT_PRESETS = {
+    "mp3": {
+        "format": "mp3", "codec": None, "bitrate": "128k", "parameters": [],
+        "extension": "mp3", "mime": "audio/mpeg",
+        "label": "MP3 (128 kbps)",
+    },
+    "mp3-speech": {
+        "format": "mp3", "codec": None, "bitrate": "48k", "parameters": ["-ac", "1", "-ar", "24000"],
+        "extension": "mp3", "mime": "audio/mpeg",
+        "label": "MP3 speech (48 kbps mono)",
+    },
+    "ogg": {
+        "format": "ogg", "codec": "libopus", "bitrate": "48k", "parameters": [],
+        "extension": "ogg", "mime": "audio/ogg",
+        "label": "Ogg Opus (48 kbps)",
+    },
+    "opus-speech": {
+        "format": "opus", "codec": "libopus", "bitrate": "24k",
+        "parameters": ["-ac", "1", "-application", "voip"],
+        "extension": "opus", "mime": "audio/ogg",
+        "label": "Opus speech (24 kbps mono)",
+    },
+}
+
+# Encoding runs on these threads; ffmpeg does the work, so the GIL is not held
+ENCODE_WORKERS = 2
+_encode_pool = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix="audiolearn-encode")
+
+def get_audio_settings():
+    """Get the export format and bitrate declared in config.json."""
+    return {
+        "format": get_setting("audio", "format", "mp3"),
+        "bitrate": get_setting("audio", "bitrate", "128k"),
+    }
+
+def resolve_export(audio_format=None, bitrate=None):
+    """
+    Picks the export preset. Unset values come from config.json; its bitrate
+    only applies to the format it is declared for.
+    
+    Returns:
+        Copy of the preset dict with "name" and the final "bitrate"
+    """
+    settings = get_audio_settings()
+    audio_format = audio_format or settings["format"]
+    if audio_format not in EXPORT_PRESETS:
+        print(f"Unknown audio format '{audio_format}', using mp3")
+        audio_format = "mp3"
+    if bitrate is None and audio_format == settings["format"]:
+        bitrate = settings["bitrate"]
+    
+    preset = dict(EXPORT_PRESETS[audio_format])
+    preset["name"] = audio_format
+    preset["bitrate"] = bitrate or preset["bitrate"]
+    return preset
+
+def encode_audio(source, output_path, preset):
+    """
+    Encodes audio to output_path with a resolved preset. Blocking.
+    source is an AudioSegment, or MP3 bytes that are decoded first.
+    
+    Returns:
+        Dict with format, bitrate, output size and encode time
+    """
+    started = time.perf_counter()
+    if isinstance(source, (bytes, bytearray)):
+        source = AudioSegment.from_file(io.BytesIO(source), format="mp3", codec="mp3")
+    
+    source.export(
+        output_path,
+        format=preset["format"],
+        codec=preset["codec"],
+        bitrate=preset["bitrate"],
+        parameters=preset["parameters"] or None
+    )
+    return {
+        "format": preset["name"],
+        "bitrate": preset["bitrate"],
+        "bytes": os.path.getsize(output_path),
+        "encode_seconds": round(time.perf_counter() - started, 3),
+        "duration_seconds": round(len(source) / 1000, 1),
+    }
+
+async def encode_audio_async(source, output_path, preset):
+    """Runs encode_audio on the shared encoder threads so the event loop stays free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_encode_pool, encode_audio, source, output_path, preset)
@@ -1,29 +1,57 @@
 import os
 import json
-import time
-import streamlit as st
-from groq import Groq
-from dotenv import load_dotenv
-
-# Load API Key
-load_dotenv()
-api_key = os.getenv("GROQ_API_KEY")
-
-if not api_key:
-    st.error("❌ Groq API Key not found! Please check your .env file.")
-    st.stop()
+import asyncio
+from src.config import get_setting
+from src.script_stream import DialogueStreamParser, recover_dialogue
+from src.llm_client import (api_key, chat_completion, stream_chat_completion, close_async_client,
+                            backoff_delay, report)
+from src.rate_limit import PRIORITY_INTERACTIVE
 
 # Configuration
-MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
-RETRY_DELAY = int(os.getenv("RETRY_DELAY", 2))
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", get_setting("api", "max_retries", 3)))
+RETRY_DELAY = int(os.getenv("RETRY_DELAY", get_setting("api", "retry_delay", 2)))
+MAX_INPUT_CHARS = get_setting("api", "max_input_chars", 60000)
+CONTINUATION_ROUNDS = 2   # follow-up requests for a script that was cut off
+
+CONTINUE_PROMPT = """
+Your previous answer was cut off. The dialogue above is everything that was
+received; the last line was {last_speaker}: "{last_text}".
+Continue the conversation from exactly that point to its natural ending.
+Return a JSON object {{"dialogue": [...]}} with ONLY the new lines; do not repeat earlier lines.
+"""
 
 # Available Groq Models
 AVAILABLE_MODELS = [
     "moonshotai/kimi-k2-instruct-0905",
 ]
 
-# Initialize Groq Client
-client = Groq(api_key=api_key)
+TONES = ["Fun & Casual", "Formal & Educational", "Debate Style"]
+
+def spent_tokens(stats):
+    """Prompt plus completion tokens of one generate_script call, from its stats dict."""
+    stages = stats.get("map", []) + [stats.get("script", {})]
+    return sum(stage.get("prompt_tokens", 0) + stage.get("completion_tokens", 0) for stage in stages)
+
+def failed_generation(error):
+    """The partial output Groq attaches to a rejected JSON-mode response, if any."""
+    body = getattr(error, "body", None)
+    if isinstance(body, dict):
+        body = body.get("error", body)
+        if isinstance(body, dict):
+            return body.get("failed_generation")
+    return None
+
+def continuation_messages(messages, lines):
+    """
+    Messages asking the model to carry on after the lines it already wrote.
+    The good lines go back as the assistant's turn, so only the remainder is
+    generated instead of the whole script.
+    """
+    return messages + [
+        {"role": "assistant", "content": json.dumps({"dialogue": lines}, ensure_ascii=False)},
+        {"role": "user", "content": CONTINUE_PROMPT.format(last_speaker=lines[-1].get("speaker", ""),
+                                                           last_text=lines[-1].get("text", "")[:200])}
+    ]
 
 def get_system_prompt(speaker1_name="Siddharth", speaker2_name="Aditi", tone="Fun & Casual"):
     """
@@ -63,75 +91,214 @@ def get_system_prompt(speaker1_name="Siddharth", speaker2_name="Aditi", tone="Fu
     return system_prompt
 
 
-def generate_script_with_retry(text_content, model="moonshotai/kimi-k2-instruct-0905", tone="Fun & Casual", 
-                               speaker1="Siddharth", speaker2="Aditi"):
+async def generate_script_async(text_content, model="moonshotai/kimi-k2-instruct-0905", tone="Fun & Casual",
+                                speaker1="Siddharth", speaker2="Aditi", stats=None, on_line=None,
+                                on_progress=None, priority=PRIORITY_INTERACTIVE):
     """
-    Generates a podcast script with exponential backoff retry logic.
+    Generates a podcast script with jittered exponential backoff retries.
+    Only the first MAX_INPUT_CHARS characters are sent; longer documents should
+    go through the map-reduce path (see generate_script).
+    If stats is a dict it receives the latency and token usage of the call.
+    
+    With on_line the response is streamed and on_line(index, line) is called
+    for every dialogue entry as soon as it is complete.
+    
+    A response that is cut off (max_tokens) or malformed is not thrown away:
+    defects are repaired, complete lines are salvaged and the model is asked
+    to continue after the last good line (up to CONTINUATION_ROUNDS times).
+    Full retries only happen when nothing could be recovered.
+    
+    on_progress receives events {"stage", "message", "level", "progress"}
+    (level is "info", "warning" or "error"; progress is 0-1 or None).
+    priority orders the call in the rate limiter's queue (see src/rate_limit.py);
+    rate-limit (429) retries happen there and do not use up these attempts.
     """
     system_prompt = get_system_prompt(speaker1, speaker2, tone)
     
+    if len(text_content) > MAX_INPUT_CHARS:
+        print(f"Source text truncated from {len(text_content):,} to {MAX_INPUT_CHARS:,} characters")
+    
     user_content = f"""
     Here is the source text to discuss:
-    {text_content[:60000]}
+    {text_content[:MAX_INPUT_CHARS]}
     
     Generate the script now. Make it engaging and appropriate for a {tone.lower()} podcast.
     """
 
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content}
+    ]
+    lines = []
+    
+    def account(usage):
+        if stats is not None:
+            stats["seconds"] = round(stats.get("seconds", 0) + usage["seconds"], 3)
+            stats["prompt_tokens"] = stats.get("prompt_tokens", 0) + usage["prompt_tokens"]
+            stats["completion_tokens"] = stats.get("completion_tokens", 0) + usage["completion_tokens"]
+            stats["queued_seconds"] = round(stats.get("queued_seconds", 0) + usage["queued_seconds"], 3)
+            if "first_token_seconds" in usage and "first_token_seconds" not in stats:
+                stats["first_token_seconds"] = usage["first_token_seconds"]
+    
+    async def request(request_messages):
+        """One model call; returns (dialogue lines, complete) and hands streamed lines to on_line."""
+        parser = DialogueStreamParser()
+        offset = len(lines)
+        
+        def emit_lines(delta):
+            completed = parser.feed(delta)
+            first_index = offset + len(parser.lines) - len(completed)
+            for position, line in enumerate(completed):
+                on_line(first_index + position, line)
+        
+        try:
+            if on_line:
+                # JSON mode cannot be streamed; the prompt already asks for JSON
+                response_text, usage = await stream_chat_completion(request_messages, model=model, max_tokens=8000,
+                                                                    on_text=emit_lines, priority=priority)
+            else:
+                response_text, usage = await chat_completion(request_messages, model=model, max_tokens=8000,
+                                                             json_mode=True, priority=priority)
+        except Exception as e:
+            # A broken stream keeps its lines; Groq rejects invalid JSON-mode
+            # output but returns what was generated
+            response_text, usage = failed_generation(e), None
+            if not parser.lines and response_text is None:
+                raise
+        if usage:
+            account(usage)
+        
+        if parser.lines:
+            # Streamed lines were already handed out; keep exactly those
+            new_lines, complete = parser.lines, parser.finished
+        else:
+            new_lines, complete = recover_dialogue(response_text)
+            for position, line in enumerate(new_lines if on_line else []):
+                on_line(offset + position, line)
+        return new_lines, complete and usage is not None and usage["finish_reason"] != "length"
+    
     for attempt in range(MAX_RETRIES):
         try:
-            progress_bar = st.progress(0)
-            status_text = st.empty()
+            report(on_progress, "script", f"Attempt {attempt + 1}/{MAX_RETRIES}: Generating script with {model}...",
+                   progress=0.0)
+            if stats is not None:
+                stats["attempts"] = attempt + 1
             
-            status_text.text(f"Attempt {attempt + 1}/{MAX_RETRIES}: Generating script with {model}...")
+            lines, complete = await request(messages)
             
-            completion = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
-                temperature=0.7,
-                max_tokens=8000,
-                response_format={"type": "json_object"}
-            )
+            # Cut off or broken: keep the good lines and ask only for the rest
+            rounds = 0
+            while lines and not complete and rounds < CONTINUATION_ROUNDS:
+                rounds += 1
+                report(on_progress, "script",
+                       f"Response ended early after {len(lines)} lines; asking the model to continue "
+                       f"({rounds}/{CONTINUATION_ROUNDS})...", progress=0.5)
+                new_lines, complete = await request(continuation_messages(messages, lines))
+                if not new_lines:
+                    break
+                lines = lines + new_lines
+            if stats is not None:
+                stats["continuations"] = rounds
             
-            response_text = completion.choices[0].message.content
-            data = json.loads(response_text)
-            
-            progress_bar.progress(100)
-            status_text.text("✅ Script generated successfully!")
-            time.sleep(0.5)
-            progress_bar.empty()
-            status_text.empty()
-            
-            # Handle different JSON structures
-            if "dialogue" in data:
-                return data["dialogue"]
-            else:
-                return data
+            if not lines:
+                raise json.JSONDecodeError("No dialogue lines in response", "", 0)
+            if not complete:
+                print(f"Script may end abruptly; keeping {len(lines)} recovered lines")
+            report(on_progress, "script", "✅ Script generated successfully!", progress=1.0)
+            return lines
 
         except json.JSONDecodeError as e:
-            st.warning(f"⚠️ JSON parsing error on attempt {attempt + 1}: {e}")
+            report(on_progress, "script", f"⚠️ JSON parsing error on attempt {attempt + 1}: {e}", "warning")
             if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY ** attempt)  # Exponential backoff
+                await asyncio.sleep(backoff_delay(attempt, RETRY_DELAY))
             else:
-                st.error("❌ Failed to parse response after retries.")
+                report(on_progress, "script", "❌ Failed to parse response after retries.", "error")
                 return None
                 
         except Exception as e:
-            st.warning(f"⚠️ API error on attempt {attempt + 1}: {str(e)[:100]}")
+            if lines:
+                report(on_progress, "script",
+                       f"⚠️ Continuation failed after {len(lines)} lines: {str(e)[:100]}", "warning")
+                return lines
+            message = "request timed out" if isinstance(e, asyncio.TimeoutError) else str(e)[:100]
+            report(on_progress, "script", f"⚠️ API error on attempt {attempt + 1}: {message}", "warning")
             if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY ** attempt)
+                await asyncio.sleep(backoff_delay(attempt, RETRY_DELAY))
             else:
-                st.error(f"❌ Failed to generate script after {MAX_RETRIES} retries.")
+                report(on_progress, "script", f"❌ Failed to generate script after {MAX_RETRIES} retries.", "error")
                 return None
     
     return None
 
 
+async def generate_podcast_script_async(text_content, model="moonshotai/kimi-k2-instruct-0905",
+                                        tone="Fun & Casual", speaker1="Siddharth", speaker2="Aditi",
+                                        map_reduce=None, stats=None, on_line=None, on_progress=None,
+                                        priority=PRIORITY_INTERACTIVE, preamble=""):
+    """
+    Async entry point for script generation; see generate_script for the arguments.
+    Safe to call from many concurrent tasks: they share the loop's connection pool.
+    preamble is instructions put in front of the text that map-reduce must not condense.
+    """
+    if map_reduce is None:
+        map_reduce = len(preamble) + len(text_content) > MAX_INPUT_CHARS
+    
+    if map_reduce:
+        from src.mapreduce import generate_script_map_reduce
+        return await generate_script_map_reduce(text_content, model, tone, speaker1, speaker2, stats=stats,
+                                                on_line=on_line, on_progress=on_progress, priority=priority,
+                                                preamble=preamble)
+    
+    if stats is not None:
+        stats["mode"] = "direct"
+        stats["script"] = {}
+    return await generate_script_async(preamble + text_content, model, tone, speaker1, speaker2,
+                                       stats["script"] if stats is not None else None,
+                                       on_line=on_line, on_progress=on_progress, priority=priority)
+
+
+def run_generation(coroutine):
+    """
+    Runs a generation coroutine to completion from synchronous code (the
+    Streamlit script thread, CLI tools) and closes the loop's client after.
+    """
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            await close_async_client()
+    return asyncio.run(run())
+
+
+def generate_script_with_retry(text_content, model="moonshotai/kimi-k2-instruct-0905", tone="Fun & Casual", 
+                               speaker1="Siddharth", speaker2="Aditi", stats=None, on_line=None,
+                               on_progress=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Synchronous wrapper around generate_script_async.
+    """
+    return run_generation(generate_script_async(text_content, model, tone, speaker1, speaker2, stats,
+                                                on_line=on_line, on_progress=on_progress, priority=priority))
+
+
 def generate_script(text_content, model="moonshotai/kimi-k2-instruct-0905", tone="Fun & Casual", 
-                   speaker1="Siddharth", speaker2="Aditi"):
+                   speaker1="Siddharth", speaker2="Aditi", map_reduce=None, stats=None, on_line=None,
+                   on_progress=None, priority=PRIORITY_INTERACTIVE):
     """
     Public wrapper for script generation with improved error handling.
+    Must not be called from a running event loop; use
+    generate_podcast_script_async there.
+    
+    Args:
+        map_reduce: True condenses the document section by section first (see
+                    src/mapreduce.py), False sends it directly (truncated to
+                    MAX_INPUT_CHARS), None picks map-reduce only when it is too long
+        stats: Optional dict, filled with per-stage latency and token usage
+        on_line: Optional callback on_line(index, line); streams the script call
+                 and reports each dialogue line as soon as it is complete
+        on_progress: Optional callback receiving progress events (see generate_script_async)
+        priority: Rate limiter priority; PRIORITY_BATCH for background work
     """
-    return generate_script_with_retry(text_content, model, tone, speaker1, speaker2)
\ No newline at end of file
+    return run_generation(generate_podcast_script_async(
+        text_content, model, tone, speaker1, speaker2,
+        map_reduce=map_reduce, stats=stats, on_line=on_line, on_progress=on_progress, priority=priority
+    ))
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import random
+import time
+import weakref
+import httpx
+from groq import AsyncGroq, DefaultAsyncHttpxClient, RateLimitError
+from dotenv import load_dotenv
+from src.config import get_setting
+from src.compression import estimate_tokens
+from src.rate_limit import (get_rate_limiter, retry_after_seconds, PRIORITY_INTERACTIVE,
+                            RATE_LIMIT_RETRIES)
+
+# Load API Key
+load_dotenv()
+api_key = os.getenv("GROQ_API_KEY")
+
+# Request settings
+REQUEST_TIMEOUT = float(get_setting("api", "timeout", 300))   # whole request, seconds
+CONNECT_TIMEOUT = 10.0
+POOL_MAX_CONNECTIONS = 16
+POOL_MAX_KEEPALIVE = 8
+
+# One pooled client per event loop (httpx pools are bound to the loop they were opened on)
+_clients = weakref.WeakKeyDictionary()
+
+# Optional factory replacing AsyncGroq, e.g. an offline stand-in (see set_client_factory)
+_client_factory = None
+
+def set_client_factory(factory=None):
+    """
+    Make get_async_client build clients with factory() instead of AsyncGroq,
+    e.g. the offline stand-in in benchmarks/fakes.py. None restores Groq.
+    """
+    global _client_factory
+    _client_factory = factory
+    _clients.clear()
+
+def get_async_client():
+    """
+    Return the running loop's shared AsyncGroq client, creating it on first use.
+
+    Every request on the loop shares its connection pool. Retries are left to
+    the callers (see backoff_delay), so the client itself never retries.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None and _client_factory is not None:
+        client = _clients[loop] = _client_factory()
+    if client is None:
+        if not api_key:
+            raise RuntimeError("Groq API Key not found! Please check your .env file.")
+        client = AsyncGroq(
+            api_key=api_key,
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE
+            ))
+        )
+        _clients[loop] = client
+    return client
+
+async def close_async_client():
+    """Close the running loop's client. Call before a short-lived loop ends."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+def backoff_delay(attempt, base=2.0, cap=30.0):
+    """
+    Jittered exponential backoff: base ** attempt seconds, scaled by a random
+    factor in [0.5, 1.5) so concurrent sessions do not retry in lockstep.
+    """
+    return min(cap, base ** attempt) * random.uniform(0.5, 1.5)
+
+async def scheduled(make_request, messages, max_tokens, priority=PRIORITY_INTERACTIVE):
+    """
+    Runs make_request(used) once the rate limiter admits it.
+
+    The call reserves its estimated prompt tokens plus max_tokens.
+    make_request fills used["prompt_tokens"] and used["completion_tokens"]
+    once the provider reports them; the reservation is settled with them
+    whether the attempt succeeds or not (a failed attempt that reported
+    nothing gives its reservation back). A 429 pauses the limiter for the
+    provider's retry-after time and the call queues again; these retries do
+    not count against the caller's error retries.
+
+    Returns:
+        Tuple of (make_request() result, seconds spent queued)
+    """
+    limiter = get_rate_limiter()
+    reserved = reserved_tokens(messages, max_tokens)
+    queued = 0.0
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        queued += await limiter.acquire(reserved, priority)
+        used = {"prompt_tokens": 0, "completion_tokens": 0}
+        succeeded = False
+        try:
+            result = await make_request(used)
+            succeeded = True
+            return result, queued
+        except RateLimitError as e:
+            if attempt == RATE_LIMIT_RETRIES:
+                raise
+            delay = retry_after_seconds(e)
+            print(f"Rate limited by Groq, pausing requests for {delay:.1f}s")
+            limiter.pause(delay)
+        finally:
+            spent = used["prompt_tokens"] + used["completion_tokens"]
+            # A finished call without reported usage keeps its estimate
+            if spent or not succeeded:
+                limiter.settle(reserved, spent)
+
+def reserved_tokens(messages, max_tokens):
+    """Tokens a call reserves: its estimated prompt plus the completion limit."""
+    return sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
+
+def record_usage(used, usage):
+    """Copy a Groq usage object's token counts into used (see scheduled)."""
+    used["prompt_tokens"] = getattr(usage, "prompt_tokens", 0) or 0
+    used["completion_tokens"] = getattr(usage, "completion_tokens", 0) or 0
+
+def report(on_progress, stage, message, level="info", progress=None):
+    """Send a progress event to the callback, if there is one."""
+    if on_progress:
+        on_progress({"stage": stage, "message": message, "level": level, "progress": progress})
+
+async def chat_completion(messages, model, max_tokens, temperature=0.7, json_mode=False,
+                          timeout=REQUEST_TIMEOUT, priority=PRIORITY_INTERACTIVE):
+    """
+    Runs one chat completion through the rate limiter and reports what it cost.
+    The request itself (not the time queued) is bounded by timeout seconds.
+
+    Returns:
+        Tuple of (response text, usage dict with prompt_tokens, completion_tokens,
+        seconds, queued_seconds, finish_reason)
+    """
+    started = time.perf_counter()
+    extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+
+    async def request(used):
+        completion = await asyncio.wait_for(
+            get_async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra
+            ),
+            timeout
+        )
+        record_usage(used, completion.usage)
+        return completion, dict(used)
+
+    (completion, used), queued = await scheduled(request, messages, max_tokens, priority)
+    usage = {
+        **used,
+        "seconds": round(time.perf_counter() - started, 3),
+        "queued_seconds": round(queued, 3),
+        "finish_reason": completion.choices[0].finish_reason,
+    }
+    return completion.choices[0].message.content, usage
+
+async def stream_chat_completion(messages, model, max_tokens, temperature=0.7, on_text=None,
+                                 timeout=REQUEST_TIMEOUT, priority=PRIORITY_INTERACTIVE):
+    """
+    Runs one chat completion as a stream through the rate limiter, calling
+    on_text with every piece of text as it arrives. The stream (not the time
+    queued) is bounded by timeout seconds.
+
+    Returns:
+        Tuple of (full response text, usage dict like chat_completion's plus
+        first_token_seconds)
+    """
+    started = time.perf_counter()
+
+    async def request(used):
+        first_token = None
+        finish_reason = None
+        parts = []
+
+        async def run():
+            nonlocal first_token, finish_reason
+            stream = await get_async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            try:
+                async for chunk in stream:
+                    # Groq reports usage on the last chunk
+                    x_groq = getattr(chunk, "x_groq", None)
+                    usage = getattr(x_groq, "usage", None) or getattr(chunk, "usage", None)
+                    if usage is not None:
+                        record_usage(used, usage)
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    parts.append(delta)
+                    if on_text:
+                        on_text(delta)
+            finally:
+                await stream.close()
+
+        # One deadline covers opening the stream and reading it to the end
+        await asyncio.wait_for(run(), timeout)
+        return "".join(parts), {**used, "first_token_seconds": round(first_token or 0, 3),
+                                "finish_reason": finish_reason}
+
+    (text, usage), queued = await scheduled(request, messages, max_tokens, priority)
+    usage = {
+        "prompt_tokens": usage["prompt_tokens"],
+        "completion_tokens": usage["completion_tokens"],
+        "seconds": round(time.perf_counter() - started, 3),
+        "first_token_seconds": usage["first_token_seconds"],
+        "queued_seconds": round(queued, 3),
+        "finish_reason": usage["finish_reason"],
+    }
+    return text, usage
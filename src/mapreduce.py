@@ -0,0 +1,197 @@
+"""
+Map-reduce script generation for documents longer than MAX_INPUT_CHARS.
+
+Map: the markdown is split into sections that are condensed concurrently.
+Reduce: the combined digest (condensed again if it is still too long) is
+turned into the dialogue by the normal script generator.
+"""
+import re
+import time
+import asyncio
+from src.llm_client import chat_completion, backoff_delay, report
+from src.rate_limit import PRIORITY_INTERACTIVE
+from src.generation import generate_script_async, MAX_INPUT_CHARS, MAX_RETRIES, RETRY_DELAY
+
+# Map stage settings
+SECTION_CHARS = 24000       # target size of one map request
+DIGEST_MAX_TOKENS = 1200    # completion budget per section digest
+MAP_CONCURRENCY = 4         # condense calls in flight at once
+MAX_REDUCE_LEVELS = 3       # re-condense the digest at most this many times
+
+HEADING = re.compile(r'^#{1,6}\s', re.MULTILINE)
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*\s')
+
+CONDENSE_PROMPT = """
+You are preparing research notes for a podcast producer.
+Condense the following section of a longer document into a dense digest:
+keep every key idea, definition, number, example and conclusion, drop
+repetition, references and formatting. Write plain prose, at most {words} words.
+Do not add an introduction or anything that is not in the text.
+"""
+
+def split_paragraph(paragraph, max_chars):
+    """
+    Splits an oversized paragraph into pieces of at most max_chars, cutting
+    after the last sentence end that fits, else at the last whitespace (a
+    hard cut only for a single run of max_chars without spaces).
+    """
+    pieces = []
+    while len(paragraph) > max_chars:
+        window = paragraph[:max_chars + 1]
+        ends = [match.end() for match in SENTENCE_END.finditer(window)]
+        cut = ends[-1] if ends else max(window.rfind(" "), window.rfind("\n")) + 1
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(paragraph[:cut].rstrip())
+        paragraph = paragraph[cut:].lstrip()
+    if paragraph:
+        pieces.append(paragraph)
+    return pieces
+
+def split_sections(text, max_chars=SECTION_CHARS):
+    """
+    Splits markdown into chunks of at most max_chars, breaking at headings
+    first, at paragraph boundaries inside oversized sections and at sentence
+    ends (or spaces) inside oversized paragraphs.
+    """
+    starts = [match.start() for match in HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    sections = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+    
+    pieces = []
+    for section in sections:
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        current = ""
+        for block in section.split("\n\n"):
+            for paragraph in split_paragraph(block, max_chars):
+                if current and len(current) + 2 + len(paragraph) > max_chars:
+                    pieces.append(current)
+                    current = paragraph
+                else:
+                    current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current:
+            pieces.append(current)
+    
+    # Pack neighbouring small sections together
+    chunks = []
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        if chunks and len(chunks[-1].rstrip()) + 2 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1].rstrip()}\n\n{piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+async def condense_section(section, model, words=600, priority=PRIORITY_INTERACTIVE):
+    """
+    Condenses one section, retrying with jittered exponential backoff.
+    
+    Returns:
+        Tuple of (digest text, usage dict)
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await chat_completion(
+                [
+                    {"role": "system", "content": CONDENSE_PROMPT.format(words=words)},
+                    {"role": "user", "content": section}
+                ],
+                model=model,
+                max_tokens=DIGEST_MAX_TOKENS,
+                temperature=0.3,
+                priority=priority
+            )
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            print(f"Condense attempt {attempt + 1} failed: {str(e)[:100]}")
+            await asyncio.sleep(backoff_delay(attempt, RETRY_DELAY))
+
+async def condense_document(text, model, max_workers=MAP_CONCURRENCY, section_chars=SECTION_CHARS,
+                            on_progress=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Map stage: condenses every section concurrently (at most max_workers calls
+    in flight) and joins the digests in document order.
+    
+    Returns:
+        Tuple of (digest text, stage stats)
+    """
+    started = time.perf_counter()
+    sections = split_sections(text, section_chars)
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+    done = 0
+    
+    async def condense(section):
+        nonlocal done
+        async with semaphore:
+            result = await condense_section(section, model, priority=priority)
+        done += 1
+        report(on_progress, "condense", f"Condensed {done}/{len(sections)} sections",
+               progress=done / len(sections))
+        return result
+    
+    # gather keeps document order
+    results = await asyncio.gather(*[condense(section) for section in sections])
+    
+    digest = "\n\n".join(f"## Part {number}\n{summary.strip()}"
+                         for number, (summary, _) in enumerate(results, 1))
+    calls = [usage for _, usage in results]
+    stage = {
+        "sections": len(sections),
+        "input_chars": len(text),
+        "output_chars": len(digest),
+        "seconds": round(time.perf_counter() - started, 3),
+        "slowest_call_seconds": max((usage["seconds"] for usage in calls), default=0),
+        "queued_seconds": round(sum(usage["queued_seconds"] for usage in calls), 3),
+        "prompt_tokens": sum(usage["prompt_tokens"] for usage in calls),
+        "completion_tokens": sum(usage["completion_tokens"] for usage in calls),
+    }
+    return digest, stage
+
+async def generate_script_map_reduce(text_content, model="moonshotai/kimi-k2-instruct-0905", tone="Fun & Casual",
+                               speaker1="Siddharth", speaker2="Aditi", max_workers=MAP_CONCURRENCY,
+                               stats=None, on_line=None, on_progress=None, priority=PRIORITY_INTERACTIVE,
+                               preamble=""):
+    """
+    Generates a script from a document of any length.
+    
+    The document is condensed in map stages until the digest fits in
+    MAX_INPUT_CHARS, then the dialogue is written from the digest. preamble
+    (e.g. a series episode header) is put in front of the digest as is,
+    never condensed.
+    If stats is a dict it receives one entry per map stage and the final
+    script call, each with latency and token usage, plus totals.
+    on_line, on_progress and priority are passed on (see generate_script_async).
+    """
+    stats = stats if stats is not None else {}
+    stats["mode"] = "map_reduce"
+    stats["map"] = []
+    started = time.perf_counter()
+    
+    digest = text_content
+    try:
+        for level in range(MAX_REDUCE_LEVELS):
+            if len(preamble) + len(digest) <= MAX_INPUT_CHARS and level > 0:
+                break
+            digest, stage = await condense_document(digest, model, max_workers, on_progress=on_progress,
+                                                    priority=priority)
+            stats["map"].append(stage)
+            print(f"Map stage {level + 1}: {stage['sections']} sections, {stage['input_chars']:,} -> "
+                  f"{stage['output_chars']:,} chars in {stage['seconds']:.1f}s")
+    except Exception as e:
+        report(on_progress, "condense", f"❌ Condensing the document failed: {str(e)[:100]}", "error")
+        return None
+    
+    stats["script"] = {}
+    script = await generate_script_async(preamble + digest, model, tone, speaker1, speaker2, stats["script"],
+                                         on_line=on_line, on_progress=on_progress, priority=priority)
+    
+    stages = stats["map"] + [stats["script"]]
+    stats["total_seconds"] = round(time.perf_counter() - started, 3)
+    stats["prompt_tokens"] = sum(stage.get("prompt_tokens", 0) for stage in stages)
+    stats["completion_tokens"] = sum(stage.get("completion_tokens", 0) for stage in stages)
+    return script
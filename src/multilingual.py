@@ -0,0 +1,171 @@
+"""
+Multi-language rendering from one script.
+
+The script is generated once; every other language gets a translation made
+with batched LLM calls, and all languages are rendered concurrently in one
+event loop. The source language starts rendering immediately while the
+translations are still running.
+"""
+import json
+import time
+import asyncio
+from src.llm_client import chat_completion, close_async_client, backoff_delay
+from src.generation import MAX_RETRIES, RETRY_DELAY
+from src.rate_limit import PRIORITY_INTERACTIVE
+from src.script_stream import recover_dialogue
+from src.tts import generate_full_audio, get_speaker_voices, DEFAULT_MAX_CONCURRENCY
+from src.tts_client import close_shared_connector
+
+TRANSLATION_BATCH_LINES = 25   # dialogue lines per translation request
+TRANSLATION_CONCURRENCY = 4    # translation requests in flight per language
+TRANSLATION_MAX_TOKENS = 6000
+
+TRANSLATE_PROMPT = """
+You translate podcast dialogue. Translate the "text" of every entry into natural,
+spoken {language}, keeping the tone and meaning. Keep each "speaker" exactly as
+given and return exactly {count} entries in the same order, as a JSON object
+{{"dialogue": [{{"speaker": ..., "text": ...}}, ...]}}.
+"""
+
+async def translate_batch(batch, language, model, priority=PRIORITY_INTERACTIVE):
+    """
+    Translates one batch of lines, retrying failed calls and replies that do
+    not match the batch line for line with jittered exponential backoff.
+    Untranslated lines are never passed off as a translation.
+
+    Returns:
+        Tuple of (translated lines, usage dict)
+
+    Raises:
+        The last error once every attempt has failed
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            text, usage = await chat_completion(
+                [
+                    {"role": "system", "content": TRANSLATE_PROMPT.format(language=language, count=len(batch))},
+                    {"role": "user", "content": json.dumps({"dialogue": batch}, ensure_ascii=False)}
+                ],
+                model=model,
+                max_tokens=TRANSLATION_MAX_TOKENS,
+                temperature=0.3,
+                json_mode=True,
+                priority=priority
+            )
+            lines, _ = recover_dialogue(text)
+            if len(lines) != len(batch):
+                raise ValueError(f"translation to {language} returned {len(lines)} of {len(batch)} lines")
+            # The hosts stay the same people whatever the model did with their names
+            return [{**line, "speaker": original["speaker"]} for line, original in zip(lines, batch)], usage
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            print(f"Translation to {language}, attempt {attempt + 1} failed: {str(e)[:100]}")
+            await asyncio.sleep(backoff_delay(attempt, RETRY_DELAY))
+
+async def translate_script_async(script, language, model="moonshotai/kimi-k2-instruct-0905",
+                                 batch_lines=TRANSLATION_BATCH_LINES, max_concurrency=TRANSLATION_CONCURRENCY,
+                                 stats=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Translates a script into language with batched, concurrent LLM calls.
+    If stats is a dict it receives batches, seconds and token usage.
+    """
+    started = time.perf_counter()
+    batches = [script[start:start + batch_lines] for start in range(0, len(script), batch_lines)]
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def translate(batch):
+        async with semaphore:
+            return await translate_batch(batch, language, model, priority)
+
+    results = await asyncio.gather(*[translate(batch) for batch in batches])
+    if stats is not None:
+        stats.update({
+            "batches": len(batches),
+            "seconds": round(time.perf_counter() - started, 3),
+            "prompt_tokens": sum(usage["prompt_tokens"] for _, usage in results),
+            "completion_tokens": sum(usage["completion_tokens"] for _, usage in results),
+        })
+    return [line for lines, _ in results for line in lines]
+
+async def render_languages_async(script, languages, speaker1="Siddharth", speaker2="Aditi",
+                                 source_language="English", model="moonshotai/kimi-k2-instruct-0905",
+                                 translations=None, pacing="Normal (100%)", silence_duration=300,
+                                 max_concurrency=DEFAULT_MAX_CONCURRENCY, use_cache=True, assembly="pcm",
+                                 plan=False, audio_format=None):
+    """
+    Renders one script in several languages concurrently.
+
+    Args:
+        script: Dialogue in source_language
+        languages: Languages to render (keys of VOICE_MAPPING)
+        translations: Optional {language: script} already translated (e.g. from the
+                      script cache); only the missing languages are translated
+        Other arguments as for generate_full_audio; each language gets its own
+        max_concurrency voice requests.
+
+    Returns:
+        Tuple of (results, report). results maps each language to {"script",
+        "audio_file", "timings", "translated"}; report has per-language
+        translation/render seconds and audio length plus the wall time.
+        A language whose translation or render fails gets audio_file None and
+        an "error" in its report entry; the other languages are unaffected.
+    """
+    started = time.perf_counter()
+    translations = dict(translations or {})
+    report = {"languages": {}}
+
+    async def render(language):
+        entry = {"translation_seconds": 0.0, "render_seconds": 0.0, "audio_duration_ms": 0, "ok": False}
+        report["languages"][language] = entry
+        try:
+            return await render_language(language, entry)
+        except Exception as e:
+            print(f"Rendering {language} failed: {e}")
+            entry["error"] = str(e)[:200]
+            return language, {"script": None, "audio_file": None, "timings": None, "translated": False}
+
+    async def render_language(language, entry):
+        translated = False
+        language_script = script if language == source_language else translations.get(language)
+        if language_script is None:
+            translation_stats = {}
+            language_script = await translate_script_async(script, language, model, stats=translation_stats)
+            entry.update(translation_seconds=translation_stats["seconds"],
+                         translation_tokens=translation_stats["prompt_tokens"] + translation_stats["completion_tokens"])
+            translated = True
+
+        render_stats = {}
+        render_started = time.perf_counter()
+        audio_file, timings = await generate_full_audio(
+            language_script, language, pacing, silence_duration,
+            get_speaker_voices(language, speaker1, speaker2), max_concurrency, render_stats,
+            use_cache=use_cache, assembly=assembly, return_timings=True, plan=plan, audio_format=audio_format
+        )
+        entry.update(
+            render_seconds=round(time.perf_counter() - render_started, 3),
+            audio_duration_ms=render_stats.get("audio_duration_ms", 0),
+            lines=len(language_script),
+            ok=audio_file is not None,
+        )
+        return language, {"script": language_script, "audio_file": audio_file, "timings": timings,
+                          "translated": translated}
+
+    results = dict(await asyncio.gather(*[render(language) for language in languages]))
+    report["total_seconds"] = round(time.perf_counter() - started, 3)
+    report["sequential_seconds"] = round(sum(entry["translation_seconds"] + entry["render_seconds"]
+                                             for entry in report["languages"].values()), 3)
+    return results, report
+
+def render_languages(script, languages, **kwargs):
+    """
+    Synchronous wrapper around render_languages_async (Streamlit, CLI).
+    Runs on a fresh event loop and closes its Groq and edge-tts connections after.
+    """
+    async def run():
+        try:
+            return await render_languages_async(script, languages, **kwargs)
+        finally:
+            await close_async_client()
+            await close_shared_connector()
+    return asyncio.run(run())
@@ -0,0 +1,283 @@
+"""
+Headless cache pre-warming for a library of PDFs.
+
+Usage:
+    python -m src.prewarm PDF_DIR [--tones "Fun & Casual" ...] [--speakers Siddharth,Aditi ...]
+        [--languages English Tamil] [--audio] [--workers 4] [--audio-workers 1]
+
+Runs extraction, script generation and (with --audio) voice recording for
+every PDF x tone x speaker pair (x language) and stores the results under
+the same cache keys app.py looks up, so a user who uploads one of these PDFs
+with matching settings gets the script and episode straight from the cache.
+Fresh entries are skipped, so re-running the command only builds what is
+missing or expired. Script requests go through the LLM queue at batch
+priority, behind interactive users of the same process.
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.processing import extract_markdown
+from src.compression import compress_text, DEFAULT_TOKEN_BUDGET
+from src.generation import generate_script, spent_tokens, AVAILABLE_MODELS, TONES
+from src.rate_limit import PRIORITY_BATCH
+from src.singleflight import run_single_flight
+from src.tts import (create_podcast_audio, get_speaker_voices, VOICE_MAPPING, PACING_PRESETS, DEFAULT_PACING,
+                     DEFAULT_MAX_CONCURRENCY)
+from src.encoding import EXPORT_PRESETS, resolve_export
+from src.cache import (get_markdown_key, get_script_key, get_audio_key, get_from_cache, save_to_cache,
+                       is_cached, save_audio_to_cache, MAX_AGE_DAYS)
+
+DEFAULT_WORKERS = 4
+DEFAULT_AUDIO_WORKERS = 1   # episodes recorded at once (each uses max_concurrency voice requests)
+STAGES = ["markdown", "script", "audio"]
+
+# PyMuPDF is not thread-safe, so one extraction runs at a time
+_extraction_lock = threading.Lock()
+
+def prewarm_markdown(pdf_path, options):
+    """
+    Extracted markdown for one PDF, from the cache or freshly extracted.
+
+    Returns:
+        Tuple of (status, data) with status "built" or "skipped"
+    """
+    with open(pdf_path, 'rb') as f:
+        pdf_bytes = f.read()
+    markdown_key = get_markdown_key(pdf_bytes)
+    data = get_from_cache(markdown_key, options["max_age_days"], stage="markdown")
+    if data is not None:
+        return "skipped", data
+    with _extraction_lock:
+        data = extract_markdown(pdf_bytes)
+    save_to_cache(data, markdown_key, {"file": os.path.basename(pdf_path)}, stage="markdown")
+    return "built", data
+
+def prewarm_script(data, tone, speaker1, speaker2, options):
+    """
+    Script for one document and setting, keyed exactly like the app's
+    "Generate Podcast Script" button (same compression, model and key).
+
+    Returns:
+        Tuple of (status, script) with status "built", "skipped" or "failed"
+    """
+    source_text = data["text"]
+    if options["compress"]:
+        source_text, _ = compress_text(source_text, token_budget=options["token_budget"])
+    cache_key = get_script_key(source_text, options["model"], tone, speaker1, speaker2)
+    script = get_from_cache(cache_key, options["max_age_days"])
+    if script:
+        return "skipped", script
+
+    # Shares the run with an app session (or another pre-warm) generating the same script
+    generation_stats = {}
+    script, _ = run_single_flight(
+        cache_key,
+        lambda: generate_script(source_text, model=options["model"], tone=tone, speaker1=speaker1,
+                                speaker2=speaker2, stats=generation_stats, priority=PRIORITY_BATCH)
+    )
+    if not script:
+        return "failed", None
+    save_to_cache(script, cache_key, {
+        "tone": tone,
+        "model": options["model"],
+        "speakers": [speaker1, speaker2],
+        "tokens": spent_tokens(generation_stats)
+    })
+    return "built", script
+
+def prewarm_audio(script, language, speaker1, speaker2, options):
+    """
+    Recorded episode for one script and language, keyed like the app's
+    "Generate Audio with Voices" button.
+
+    Returns:
+        Tuple of (status, None) with status "built", "skipped" or "failed"
+    """
+    voices = get_speaker_voices(language, speaker1, speaker2)
+    preset = resolve_export(options["format"])
+    audio_key = get_audio_key(script, language, voices, options["pacing"], options["silence"],
+                              f"{preset['name']}@{preset['bitrate']}", options["plan"], options["assembly"])
+    if is_cached(audio_key, options["max_age_days"], stage="audio"):
+        return "skipped", None
+
+    audio_file, timings = create_podcast_audio(
+        script,
+        language=language,
+        pacing=options["pacing"],
+        silence_duration=options["silence"],
+        custom_speakers=voices,
+        max_concurrency=options["max_concurrency"],
+        assembly=options["assembly"],
+        return_timings=True,
+        plan=options["plan"],
+        audio_format=preset["name"]
+    )
+    if not audio_file:
+        return "failed", None
+    try:
+        saved = save_audio_to_cache(audio_key, audio_file, timings, {
+            "language": language,
+            "speakers": [speaker1, speaker2],
+            "format": preset["name"]
+        })
+    finally:
+        os.remove(audio_file)
+    return ("built" if saved else "failed"), None
+
+def prewarm_library(pdf_dir, tones=None, speaker_pairs=None, languages=None, model=AVAILABLE_MODELS[0],
+                    audio=False, workers=DEFAULT_WORKERS, audio_workers=DEFAULT_AUDIO_WORKERS,
+                    compress=True, token_budget=DEFAULT_TOKEN_BUDGET, pacing=DEFAULT_PACING,
+                    silence_duration=300, max_concurrency=DEFAULT_MAX_CONCURRENCY, assembly="pcm",
+                    plan=True, audio_format=None, max_age_days=MAX_AGE_DAYS):
+    """
+    Fill the markdown, script and (optionally) audio caches for every PDF in pdf_dir.
+
+    Extraction and script jobs run on a pool of `workers` threads (extraction
+    itself one PDF at a time), recordings on their own pool of
+    `audio_workers` threads. Jobs are pipelined: a PDF's scripts are queued
+    as soon as its markdown is ready, and a script's recordings as soon as
+    the script is.
+
+    Args:
+        pdf_dir: Folder of PDFs
+        tones: Tones to generate (default: the app's default tone)
+        speaker_pairs: List of (speaker1, speaker2) (default: the app's default hosts)
+        languages: Voice languages to record with --audio (default: English)
+        model: Groq model, as selected in the app
+        audio: Also record every script in every language
+        workers: Extraction and script jobs running at once
+        audio_workers: Episodes recorded at once
+        compress, token_budget: Input compression, as in the app's Advanced Settings
+        Other arguments as for create_podcast_audio; they must match the app's
+        settings for its lookups to hit.
+
+    Returns:
+        Summary dict with built/skipped/failed counts (overall and per stage) and wall time
+    """
+    tones = tones or [TONES[0]]
+    speaker_pairs = speaker_pairs or [("Siddharth", "Aditi")]
+    languages = languages or ["English"]
+    options = {
+        "model": model,
+        "compress": compress,
+        "token_budget": token_budget,
+        "pacing": pacing,
+        "silence": silence_duration,
+        "max_concurrency": max_concurrency,
+        "assembly": assembly,
+        "plan": plan,
+        "format": audio_format,
+        "max_age_days": max_age_days,
+    }
+    counts = {stage: {"built": 0, "skipped": 0, "failed": 0} for stage in STAGES}
+    pdf_paths = [os.path.join(pdf_dir, name) for name in sorted(os.listdir(pdf_dir)) if name.lower().endswith(".pdf")]
+
+    print(f"Pre-warm: {len(pdf_paths)} PDFs x {len(tones)} tones x {len(speaker_pairs)} speaker pairs"
+          + (f" x {len(languages)} languages" if audio else "") + f", {workers} workers")
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool, \
+            ThreadPoolExecutor(max_workers=max(1, audio_workers)) as audio_pool:
+        pending = {
+            pool.submit(prewarm_markdown, path, options): ("markdown", os.path.basename(path), None)
+            for path in pdf_paths
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, label, context = pending.pop(future)
+                error = None
+                try:
+                    status, value = future.result()
+                except Exception as e:
+                    status, value, error = "failed", None, str(e)[:200]
+                counts[stage][status] += 1
+                if status == "built":
+                    print(f"✅ {stage} {label}")
+                elif status == "failed":
+                    print(f"❌ {stage} {label}" + (f": {error}" if error else ""))
+                if value is None:
+                    continue
+
+                if stage == "markdown":
+                    for tone in tones:
+                        for speaker1, speaker2 in speaker_pairs:
+                            future = pool.submit(prewarm_script, value, tone, speaker1, speaker2, options)
+                            pending[future] = ("script", f"{label} [{tone}, {speaker1} & {speaker2}]",
+                                               (speaker1, speaker2))
+                elif stage == "script" and audio:
+                    speaker1, speaker2 = context
+                    for language in languages:
+                        future = audio_pool.submit(prewarm_audio, value, language, speaker1, speaker2, options)
+                        pending[future] = ("audio", f"{label} [{language}]", context)
+
+    return {
+        "stages": counts,
+        "built": sum(stage["built"] for stage in counts.values()),
+        "skipped": sum(stage["skipped"] for stage in counts.values()),
+        "failed": sum(stage["failed"] for stage in counts.values()),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+def parse_speaker_pair(value):
+    """"Siddharth,Aditi" -> ("Siddharth", "Aditi")."""
+    names = [name.strip() for name in value.split(",")]
+    if len(names) != 2 or not all(names):
+        raise argparse.ArgumentTypeError("speakers must be given as NAME1,NAME2")
+    return tuple(names)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fill the AudioLearn caches for a folder of PDFs")
+    parser.add_argument("pdf_dir", help="Folder of PDFs")
+    parser.add_argument("--tones", nargs="+", choices=TONES, default=[TONES[0]])
+    parser.add_argument("--speakers", nargs="+", type=parse_speaker_pair, default=[("Siddharth", "Aditi")],
+                        help="Speaker pairs as NAME1,NAME2")
+    parser.add_argument("--languages", nargs="+", choices=list(VOICE_MAPPING.keys()), default=["English"],
+                        help="Voice languages (with --audio)")
+    parser.add_argument("--model", default=AVAILABLE_MODELS[0], choices=AVAILABLE_MODELS)
+    parser.add_argument("--audio", action="store_true", help="Also record every script")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Extraction and script jobs running at once")
+    parser.add_argument("--audio-workers", type=int, default=DEFAULT_AUDIO_WORKERS,
+                        help="Episodes recorded at once")
+    parser.add_argument("--no-compress", action="store_true", help="Send the full document (app: Compress Input off)")
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Input token budget")
+    parser.add_argument("--pacing", default=DEFAULT_PACING, choices=list(PACING_PRESETS.keys()))
+    parser.add_argument("--silence", type=int, default=300, help="Pause between speakers (ms)")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Parallel voice requests per episode")
+    parser.add_argument("--fast-assembly", action="store_true", help="Splice MP3 frames, no re-encode")
+    parser.add_argument("--format", choices=list(EXPORT_PRESETS.keys()),
+                        help="Output preset (default: audio.format in config.json)")
+    parser.add_argument("--no-plan", action="store_true", help="Skip line planning (app: Smart Line Planning off)")
+    args = parser.parse_args()
+
+    summary = prewarm_library(
+        args.pdf_dir,
+        tones=args.tones,
+        speaker_pairs=args.speakers,
+        languages=args.languages,
+        model=args.model,
+        audio=args.audio,
+        workers=args.workers,
+        audio_workers=args.audio_workers,
+        compress=not args.no_compress,
+        token_budget=args.token_budget,
+        pacing=args.pacing,
+        silence_duration=args.silence,
+        max_concurrency=args.max_concurrency,
+        assembly="mp3" if args.fast_assembly else "pcm",
+        plan=not args.no_plan,
+        audio_format=args.format
+    )
+
+    print("\n📊 Pre-warm summary")
+    for stage, counts in summary["stages"].items():
+        print(f"  {stage:>8}: built {counts['built']}, skipped {counts['skipped']}, failed {counts['failed']}")
+    print(f"  Total: built {summary['built']}, skipped {summary['skipped']}, failed {summary['failed']} "
+          f"in {summary['seconds']}s")
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,179 @@
+"""
+Rate-limit-aware scheduling for Groq calls.
+
+One RateLimiter per process keeps token buckets for requests per minute and
+tokens per minute, shared by every event loop and thread. Calls wait in a
+priority queue (interactive before batch, then first come first served) and
+a 429 pauses all admissions for the retry-after time the provider asks for.
+"""
+import re
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from src.config import get_setting
+
+REQUESTS_PER_MINUTE = get_setting("api", "requests_per_minute", 30)
+TOKENS_PER_MINUTE = get_setting("api", "tokens_per_minute", 60000)
+RATE_LIMIT_RETRIES = 5          # 429s tolerated per call (separate from error retries)
+DEFAULT_RETRY_AFTER = 5.0       # seconds, when the provider gives no hint
+MAX_RETRY_AFTER = 60.0          # longer hints (daily quotas) are not waited out in one go
+MAX_POLL_INTERVAL = 0.5         # seconds between admission checks while queued
+
+# Priorities: lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+class TokenBucket:
+    """Refills continuously up to capacity at capacity-per-minute."""
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until(self, amount):
+        """Time until amount is available (amounts above capacity need a full bucket)."""
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+class RateLimiter:
+    """
+    Admits calls under request and token budgets in priority order.
+
+    acquire() waits (without blocking the event loop) until the caller is at
+    the head of the queue and both buckets can pay for it. Token costs are
+    reserved up front from an estimate and corrected with settle() once the
+    real usage is known.
+    """
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.lock = threading.Lock()
+        self.queue = []
+        self.sequence = itertools.count()
+        self.paused_until = 0.0
+        self.admitted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def acquire(self, tokens, priority=PRIORITY_INTERACTIVE):
+        """
+        Waits for a slot and reserves one request and `tokens` tokens.
+
+        Returns:
+            Seconds spent waiting in the queue
+        """
+        entry = (priority, next(self.sequence))
+        started = time.monotonic()
+        with self.lock:
+            heapq.heappush(self.queue, entry)
+
+        try:
+            while True:
+                with self.lock:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+                    delay = max(self.paused_until - now,
+                                self.requests.seconds_until(1),
+                                self.tokens.seconds_until(tokens))
+                    if self.queue[0] == entry and delay <= 0:
+                        heapq.heappop(self.queue)
+                        self.requests.level -= 1
+                        self.tokens.level -= min(tokens, self.tokens.capacity)
+                        waited = now - started
+                        self.admitted += 1
+                        self.total_wait += waited
+                        self.max_wait = max(self.max_wait, waited)
+                        return waited
+                await asyncio.sleep(min(max(delay, 0.05), MAX_POLL_INTERVAL))
+        except BaseException:
+            with self.lock:
+                if entry in self.queue:
+                    self.queue.remove(entry)
+                    heapq.heapify(self.queue)
+            raise
+
+    def settle(self, reserved, used):
+        """Correct a reservation with the tokens the call actually used."""
+        with self.lock:
+            # acquire() takes at most a full bucket, so only that much was reserved
+            deducted = min(reserved, self.tokens.capacity)
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + deducted - used)
+
+    def pause(self, seconds):
+        """Stop admitting calls for `seconds` (a 429's retry-after)."""
+        with self.lock:
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self):
+        """Queue depth, wait times and bucket levels for display."""
+        with self.lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "queue_depth": len(self.queue),
+                "interactive_queued": sum(1 for priority, _ in self.queue if priority <= PRIORITY_INTERACTIVE),
+                "admitted": self.admitted,
+                "throttled": self.throttled,
+                "avg_wait_seconds": round(self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+                "max_wait_seconds": round(self.max_wait, 3),
+                "paused_seconds": round(max(0.0, self.paused_until - now), 1),
+                "requests_available": int(self.requests.level),
+                "tokens_available": int(self.tokens.level),
+            }
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+def configure_rate_limiter(requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+    """Replace the process-wide limiter, e.g. with higher limits for a paid tier or a benchmark."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        return _limiter
+
+def get_scheduler_stats():
+    """Queue depth and wait statistics of the process-wide rate limiter."""
+    return get_rate_limiter().stats()
+
+def parse_duration(value):
+    """Parse retry-after style values: plain seconds ("7") or Groq resets ("1m2.5s", "250ms")."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = DURATION_PART.findall(value)
+    return sum(float(amount) * units[unit] for amount, unit in parts) if parts else None
+
+def retry_after_seconds(error):
+    """The wait a 429 response asks for, from retry-after or Groq's reset headers."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for header in ("retry-after", "x-ratelimit-reset-tokens", "x-ratelimit-reset-requests"):
+        seconds = parse_duration(headers.get(header))
+        if seconds:
+            return min(seconds, MAX_RETRY_AFTER)
+    return DEFAULT_RETRY_AFTER
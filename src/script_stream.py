@@ -0,0 +1,166 @@
+import re
+import json
+
+class DialogueStreamParser:
+    """
+    Incremental parser for a streamed {"dialogue": [...]} response.
+
+    feed() takes the text as it arrives and returns the dialogue entries that
+    were completed by it, so lines can be shown (or voiced) long before the
+    whole JSON document is done. Text before the "dialogue" array (code
+    fences, other keys) is skipped.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0        # next character to scan
+        self.in_array = False    # inside the "dialogue" list
+        self.finished = False    # saw the list's closing bracket
+        self.entry_start = None  # start of the object being read
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.lines = []
+
+    def feed(self, text):
+        """
+        Adds streamed text.
+
+        Returns:
+            List of dialogue entries completed by this chunk
+        """
+        self.buffer += text
+        completed = []
+
+        if not self.in_array:
+            key = self.buffer.find('"dialogue"')
+            bracket = self.buffer.find("[", key) if key != -1 else -1
+            if bracket == -1:
+                return completed
+            self.in_array = True
+            self.position = bracket + 1
+
+        buffer = self.buffer
+        while self.position < len(buffer) and not self.finished:
+            char = buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.entry_start = self.position
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0 and self.entry_start is not None:
+                    entry = self._parse_entry(buffer[self.entry_start:self.position + 1])
+                    if entry:
+                        self.lines.append(entry)
+                        completed.append(entry)
+                    self.entry_start = None
+            elif char == "]" and self.depth == 0:
+                self.finished = True
+            self.position += 1
+
+        return completed
+
+    @staticmethod
+    def _parse_entry(raw):
+        """Parse one dialogue object, ignoring entries without speaker and text."""
+        try:
+            entry = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(entry, dict) and "speaker" in entry and "text" in entry:
+            return entry
+        return None
+
+TRAILING_COMMA = re.compile(r',\s*([}\]])')
+MISSING_COMMA = re.compile(r'}\s*{')
+
+def repair_json(text):
+    """
+    Fixes the defects models commonly produce around otherwise valid JSON:
+    code fences and chatter around the object, smart quotes used as string
+    delimiters, trailing commas, missing commas between entries and raw
+    newlines inside strings. Text inside strings is only touched to escape
+    line breaks, so quoted speech like “hi” or "{...}" survives.
+    Truncated output is not completed here (see recover_dialogue).
+    """
+    start = min((index for index in (text.find("{"), text.find("[")) if index != -1), default=0)
+    end = max(text.rfind("}"), text.rfind("]")) + 1 or len(text)
+    text = text[start:end]
+
+    # Split into structure and strings; only the structure gets the substitutions
+    repaired = []
+    structure = []
+    in_string = escaped = smart = False
+    for index, char in enumerate(text):
+        if not in_string:
+            if char == '"' or char in "“”":
+                repaired.append(MISSING_COMMA.sub('},{', TRAILING_COMMA.sub(r'\1', "".join(structure))))
+                structure = []
+                in_string, smart = True, char != '"'
+                char = '"'
+                repaired.append(char)
+            else:
+                structure.append(char)
+            continue
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            if smart:
+                char = '\\"'
+            else:
+                in_string = False
+        elif char in "“”" and smart and text[index + 1:].lstrip()[:1] in ("", ",", ":", "}", "]"):
+            # A smart quote closes a smart-quoted string only where JSON expects the closing quote
+            in_string = False
+            char = '"'
+        elif char == "\n":
+            char = "\\n"
+        repaired.append(char)
+    repaired.append(MISSING_COMMA.sub('},{', TRAILING_COMMA.sub(r'\1', "".join(structure))))
+    return "".join(repaired)
+
+def dialogue_from(data):
+    """The dialogue list of a parsed response ({"dialogue": [...]} or a bare list)."""
+    if isinstance(data, dict):
+        data = data.get("dialogue", data)
+    if not isinstance(data, list):
+        return None
+    return [entry for entry in data if isinstance(entry, dict) and "speaker" in entry and "text" in entry]
+
+def recover_dialogue(text):
+    """
+    Gets as much dialogue as possible out of a model response.
+
+    Tries the response as is, then repaired, then salvages every complete
+    entry from a truncated or broken response.
+
+    Returns:
+        Tuple of (dialogue lines, complete) where complete is False when the
+        lines were salvaged from output that ended early or could not be parsed
+    """
+    for candidate in (text, repair_json(text)):
+        try:
+            lines = dialogue_from(json.loads(candidate))
+        except json.JSONDecodeError:
+            continue
+        if lines is not None:
+            return lines, True
+
+    parser = DialogueStreamParser()
+    parser.feed(text)
+    if not parser.in_array and text.lstrip().startswith("["):
+        # Bare list without the "dialogue" key
+        parser = DialogueStreamParser()
+        parser.feed('{"dialogue": ' + text.lstrip())
+    return parser.lines, parser.finished
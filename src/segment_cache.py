@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# In-process cache for synthesized MP3 segments, shared by all sessions
+SEGMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MB of compressed audio
+
+_segments = OrderedDict()
+_total_bytes = 0
+_max_bytes = SEGMENT_CACHE_MAX_BYTES
+_lock = threading.Lock()
+
+def get_segment_key(text, voice, rate_str):
+    """Generate a content-addressed key for one synthesized line."""
+    combined = f"{voice}\x00{rate_str}\x00{text}"
+    return hashlib.sha256(combined.encode()).hexdigest()
+
+def get_segment(segment_key):
+    """
+    Return (MP3 bytes, word boundaries) for a cached line, or None.
+    Marks the entry as recently used.
+    """
+    with _lock:
+        entry = _segments.get(segment_key)
+        if entry is not None:
+            _segments.move_to_end(segment_key)
+        return entry
+
+def put_segment(segment_key, data, words=None):
+    """Store MP3 bytes for a line, evicting least recently used entries over the size limit."""
+    global _total_bytes
+    if len(data) > _max_bytes:
+        return False
+    
+    with _lock:
+        if segment_key in _segments:
+            _total_bytes -= len(_segments.pop(segment_key)[0])
+        _segments[segment_key] = (data, words or [])
+        _total_bytes += len(data)
+        _evict()
+    return True
+
+def _evict():
+    """Drop least recently used entries until the cache fits. Caller holds the lock."""
+    global _total_bytes
+    while _total_bytes > _max_bytes and _segments:
+        _, (data, _) = _segments.popitem(last=False)
+        _total_bytes -= len(data)
+
+def set_segment_cache_limit(max_bytes):
+    """Change the cache size limit, evicting immediately if needed."""
+    global _max_bytes
+    with _lock:
+        _max_bytes = max_bytes
+        _evict()
+
+def get_segment_cache_info():
+    """Get current cache size."""
+    with _lock:
+        return {
+            "entries": len(_segments),
+            "bytes": _total_bytes,
+            "max_bytes": _max_bytes
+        }
+
+def clear_segment_cache():
+    """Clear all cached segments."""
+    global _total_bytes
+    with _lock:
+        _segments.clear()
+        _total_bytes = 0
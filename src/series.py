@@ -0,0 +1,139 @@
+"""
+Series generation: one long document split into N episodes.
+
+Episodes flow through two bounded stages, script writing (LLM) and voice
+recording (TTS). While episode k is being recorded the script for episode
+k+1 is already being written, so a series takes roughly the slowest stage
+times N instead of the sum of both stages times N.
+"""
+import time
+import asyncio
+from src.mapreduce import split_sections
+from src.generation import generate_podcast_script_async
+from src.llm_client import close_async_client
+from src.rate_limit import PRIORITY_INTERACTIVE
+from src.tts import generate_full_audio, get_speaker_voices, DEFAULT_MAX_CONCURRENCY
+from src.tts_client import close_shared_connector
+
+SCRIPT_WORKERS = 2   # episodes being written at once
+AUDIO_WORKERS = 1    # episodes being recorded at once (each uses max_concurrency voice requests)
+
+EPISODE_HEADER = """(This is episode {number} of {total} in a series on one document.
+{position} Only discuss the part of the document below.)
+
+"""
+
+def split_into_episodes(text, episodes):
+    """
+    Splits markdown into `episodes` parts of similar length, breaking at
+    headings (or paragraphs) so no section is cut in the middle.
+    """
+    episodes = max(1, int(episodes))
+    target = len(text) / episodes
+    sections = split_sections(text, max(1000, int(target / 2)))
+
+    parts = [[]]
+    size = 0
+    for position, section in enumerate(sections):
+        remaining_sections = len(sections) - position
+        remaining_parts = episodes - len(parts)
+        # Start a new episode once this one is full, but leave a section for every remaining episode
+        if parts[-1] and remaining_parts > 0 and (size + len(section) / 2 > target
+                                                  or remaining_sections <= remaining_parts):
+            parts.append([])
+            size = 0
+        parts[-1].append(section)
+        size += len(section)
+    # split_sections strips the breaks between its pieces; put a blank line back
+    return ["\n\n".join(section.strip("\n") for section in part) for part in parts if part]
+
+def episode_position(number, total):
+    if number == 1:
+        return "Open the series and introduce the document."
+    if number == total:
+        return "Briefly recall earlier episodes and close the series."
+    return "Briefly recall the previous episode, then continue."
+
+async def generate_series_async(text, episodes, model="moonshotai/kimi-k2-instruct-0905", tone="Fun & Casual",
+                                speaker1="Siddharth", speaker2="Aditi", language="English",
+                                pacing="Normal (100%)", silence_duration=300,
+                                max_concurrency=DEFAULT_MAX_CONCURRENCY, script_workers=SCRIPT_WORKERS,
+                                audio_workers=AUDIO_WORKERS, use_cache=True, assembly="pcm", plan=False,
+                                audio_format=None, on_episode=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Writes and records a series with pipelined, bounded script and audio stages.
+
+    Args:
+        text: The whole document
+        episodes: Number of episodes to split it into
+        script_workers: Episodes whose scripts are generated at the same time
+        audio_workers: Episodes recorded at the same time
+        on_episode: Optional callback on_episode(number, result) as each episode finishes
+        Other arguments as for generate_script and generate_full_audio
+
+    Returns:
+        Tuple of (episode results in order, report). Each result has number,
+        script, audio_file, timings; the report has per-episode stage times,
+        the total wall time and the sum of all stage times.
+    """
+    started = time.perf_counter()
+    parts = split_into_episodes(text, episodes)
+    total = len(parts)
+    script_slots = asyncio.Semaphore(max(1, script_workers))
+    audio_slots = asyncio.Semaphore(max(1, audio_workers))
+    custom_speakers = get_speaker_voices(language, speaker1, speaker2)
+
+    async def produce(number, part):
+        entry = {"number": number, "characters": len(part)}
+        async with script_slots:
+            stage = time.perf_counter()
+            entry["script_started"] = round(stage - started, 3)
+            header = EPISODE_HEADER.format(number=number, total=total, position=episode_position(number, total))
+            script = await generate_podcast_script_async(part, model, tone, speaker1, speaker2,
+                                                         priority=priority, preamble=header)
+            entry["script_seconds"] = round(time.perf_counter() - stage, 3)
+
+        audio_file, timings = None, None
+        if script:
+            async with audio_slots:
+                stage = time.perf_counter()
+                entry["audio_started"] = round(stage - started, 3)
+                render_stats = {}
+                audio_file, timings = await generate_full_audio(
+                    script, language, pacing, silence_duration, custom_speakers, max_concurrency, render_stats,
+                    use_cache=use_cache, assembly=assembly, return_timings=True, plan=plan,
+                    audio_format=audio_format
+                )
+                entry["audio_seconds"] = round(time.perf_counter() - stage, 3)
+                entry["audio_duration_ms"] = render_stats.get("audio_duration_ms", 0)
+
+        entry["finished"] = round(time.perf_counter() - started, 3)
+        result = {"number": number, "script": script, "audio_file": audio_file, "timings": timings, "report": entry}
+        if on_episode:
+            on_episode(number, result)
+        return result
+
+    results = await asyncio.gather(*[produce(number, part) for number, part in enumerate(parts, 1)])
+    episode_reports = [result["report"] for result in results]
+    report = {
+        "episodes": episode_reports,
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "stage_seconds": round(sum(entry.get("script_seconds", 0) + entry.get("audio_seconds", 0)
+                                   for entry in episode_reports), 3),
+        "slowest_script_seconds": max((entry.get("script_seconds", 0) for entry in episode_reports), default=0),
+        "slowest_audio_seconds": max((entry.get("audio_seconds", 0) for entry in episode_reports), default=0),
+    }
+    return results, report
+
+def generate_series(text, episodes, **kwargs):
+    """
+    Synchronous wrapper around generate_series_async (Streamlit, CLI).
+    Runs on a fresh event loop and closes its Groq and edge-tts connections after.
+    """
+    async def run():
+        try:
+            return await generate_series_async(text, episodes, **kwargs)
+        finally:
+            await close_async_client()
+            await close_shared_connector()
+    return asyncio.run(run())
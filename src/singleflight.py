@@ -0,0 +1,154 @@
+"""
+Single-flight deduplication of identical script generations.
+
+Concurrent requests with the same key (see get_cache_key) share one
+generation: within a process followers wait on the leader's event, across
+processes on the same host the leader holds an exclusive file lock and
+publishes its result to a small file the waiting processes read.
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process deduplication only
+    fcntl = None
+
+INFLIGHT_DIR = os.path.join(tempfile.gettempdir(), "audiolearn_inflight")
+WAIT_TIMEOUT = 600        # seconds a follower waits for the leader
+POLL_INTERVAL = 0.25      # seconds between lock attempts while waiting
+RESULT_TTL = 300          # seconds a published result stays readable
+
+# key -> {"event": threading.Event, "result": ...} for generations running in this process
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _paths(key):
+    return os.path.join(INFLIGHT_DIR, f"{key}.lock"), os.path.join(INFLIGHT_DIR, f"{key}.json")
+
+def _publish(result_path, result):
+    """Write the leader's result atomically so readers never see a partial file."""
+    tmp_path = f"{result_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"result": result, "timestamp": time.time()}, f)
+    os.replace(tmp_path, result_path)
+
+def _read_published(result_path, since):
+    """Return a result published at or after `since`, or None."""
+    try:
+        with open(result_path, "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("timestamp", 0) < since:
+        return None
+    return entry.get("result")
+
+def _cleanup_results():
+    """Remove published results older than RESULT_TTL."""
+    cutoff = time.time() - RESULT_TTL
+    try:
+        for filename in os.listdir(INFLIGHT_DIR):
+            path = os.path.join(INFLIGHT_DIR, filename)
+            if filename.endswith(".json") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+    except OSError:
+        pass
+
+def _run_across_processes(key, fn, on_wait, wait_timeout):
+    """Leader election between processes via an exclusive lock on a per-key file."""
+    if fcntl is None:
+        return fn(), False
+
+    os.makedirs(INFLIGHT_DIR, exist_ok=True)
+    lock_path, result_path = _paths(key)
+    started = time.time()
+
+    with open(lock_path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another process is generating this key: wait for it to finish
+            if on_wait:
+                on_wait()
+            deadline = time.monotonic() + wait_timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() > deadline:
+                        print(f"Single-flight wait for {key} timed out; generating independently")
+                        return fn(), False
+                    time.sleep(POLL_INTERVAL)
+
+            result = _read_published(result_path, started)
+            if result is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                return result, True
+            # The leader failed or published nothing: generate ourselves, still holding the lock
+
+        try:
+            result = fn()
+            if result is not None:
+                _publish(result_path, result)
+            return result, False
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            _cleanup_results()
+
+def run_single_flight(key, fn, on_wait=None, wait_timeout=WAIT_TIMEOUT):
+    """
+    Runs fn() once for all concurrent callers with the same key.
+
+    Args:
+        key: Identity of the work, e.g. get_cache_key(...)
+        fn: Zero-argument callable doing the work; its result must be JSON-serializable
+        on_wait: Called (in the waiting caller's thread) when another caller is already running the key
+        wait_timeout: Seconds to wait for another caller before running fn independently
+
+    Returns:
+        Tuple of (result, shared) where shared is True when the result came
+        from another caller's run
+    """
+    deadline = time.monotonic() + wait_timeout
+    waited = False
+    while True:
+        with _inflight_lock:
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = {"event": threading.Event(), "result": None}
+                _inflight[key] = flight
+        if leader:
+            break
+
+        if on_wait and not waited:
+            on_wait()
+        waited = True
+        if flight["event"].wait(max(0, deadline - time.monotonic())):
+            if flight["result"] is not None:
+                return flight["result"], True
+            # The leader failed or produced nothing: run for election again
+            continue
+
+        # The leader is stuck: take over the key and generate independently
+        print(f"Single-flight wait for {key} timed out; generating independently")
+        with _inflight_lock:
+            if _inflight.get(key) is flight:
+                flight = {"event": threading.Event(), "result": None}
+                _inflight[key] = flight
+                break
+        deadline = time.monotonic() + wait_timeout
+
+    try:
+        flight["result"], shared = _run_across_processes(key, fn, on_wait, wait_timeout)
+        return flight["result"], shared
+    finally:
+        with _inflight_lock:
+            if _inflight.get(key) is flight:
+                _inflight.pop(key)
+        flight["event"].set()
@@ -1,9 +1,15 @@
-import edge_tts
 import asyncio
 import tempfile
+import queue
+import io
+import time
 import os
+import re
+from functools import lru_cache
 from pydub import AudioSegment
-import streamlit as st
+from src.segment_cache import get_segment_key, get_segment, put_segment
+from src.encoding import resolve_export, encode_audio_async
+from src.tts_client import create_communicate, stream_speech, get_speech_loop, run_on_speech_loop
 
 # Voice Configuration with Language Support
 VOICE_MAPPING = {
@@ -28,6 +34,60 @@ PACING_PRESETS = {
     "Fast (125%)": 1.25,
     "Very Fast (150%)": 1.5,
 }
+DEFAULT_PACING = "Slow (75%)"   # preselected in the app; pre-warm uses it so its audio keys match
+
+# Concurrency Settings (parallel edge-tts requests per episode)
+DEFAULT_MAX_CONCURRENCY = 4
+SEGMENT_MAX_RETRIES = 3
+SEGMENT_RETRY_DELAY = 1.0  # seconds, doubled after each failed attempt
+
+# Short phrase used to warm up voices when a session starts
+WARMUP_TEXT = {
+    "English": "Hello.",
+    "Tamil": "வணக்கம்.",
+}
+
+# Progressive playback: lines per published part (the first part is a single line)
+DEFAULT_PART_LINES = 4
+
+# Stream format edge-tts returns (audio-24khz-48kbitrate-mono-mp3)
+EDGE_TTS_FRAME_RATE = 24000
+EDGE_TTS_BITRATE = "48k"
+EDGE_TTS_BITRATE_KBPS = 48  # bits per millisecond
+
+# Utterance planning: short same-speaker lines are merged, long ones split
+PLAN_MERGE_MAX_CHARS = 80     # lines shorter than this are merge candidates
+PLAN_SPLIT_MAX_CHARS = 600    # no single request longer than this
+
+SENTENCE_BREAK = re.compile(r'(?<=[.!?।])\s+')
+CLAUSE_BREAK = re.compile(r'(?<=[,;:])\s+')
+
+def rate_to_string(rate):
+    """
+    Converts a speed multiplier into an edge-tts rate string.
+    Rate format: +50% means 50% faster, -25% means 25% slower
+    """
+    return f"{int(round((rate - 1) * 100)):+d}%"
+
+def get_speaker_voices(language, speaker1, speaker2):
+    """
+    Maps the two host names to voices: known names keep their own voice, others
+    get the language's first (host) and second (expert) voice.
+    """
+    language_voices = VOICE_MAPPING.get(language, VOICE_MAPPING["English"])
+    voices = list(language_voices.values())
+    return {
+        speaker1: language_voices.get(speaker1, voices[0]),
+        speaker2: language_voices.get(speaker2, voices[1] if len(voices) > 1 else voices[0]),
+    }
+
+def resolve_voice(speaker, language_voices, custom_speakers=None):
+    """
+    Picks the voice for a speaker - custom speaker mappings win over language defaults.
+    """
+    if custom_speakers and speaker in custom_speakers:
+        return custom_speakers[speaker]
+    return language_voices.get(speaker, list(language_voices.values())[0])
 
 async def generate_audio_segment(text, voice, output_file, rate=1.0):
     """
@@ -35,98 +95,642 @@ async def generate_audio_segment(text, voice, output_file, rate=1.0):
     Rate: 1.0 = normal speed, 0.75 = slow, 1.25 = fast
     """
     try:
-        # Rate format: +50% means 50% faster, -25% means 25% slower
-        rate_str = f"{int((rate - 1) * 100):+d}%" if rate != 1.0 else "0%"
-        
-        communicate = edge_tts.Communicate(text, voice, rate=rate_str)
+        communicate = create_communicate(text, voice, rate_to_string(rate))
         await communicate.save(output_file)
     except Exception as e:
         print(f"Error generating audio segment: {e}")
         raise
 
+async def generate_audio_bytes(text, voice, rate=1.0, word_boundaries=None, request_metrics=None):
+    """
+    Streams a single audio segment from EdgeTTS straight into memory.
+    Returns the MP3 bytes without writing anything to disk.
+    
+    If word_boundaries is a list, it is filled with {"text", "offset_ms",
+    "duration_ms"} for every spoken word, relative to the segment start.
+    If request_metrics is a dict, it receives the handshake/synthesis split
+    from stream_speech.
+    """
+    try:
+        buffer = io.BytesIO()
+        async for chunk in stream_speech(text, voice, rate_to_string(rate), request_metrics):
+            if chunk["type"] == "audio":
+                buffer.write(chunk["data"])
+            elif chunk["type"] == "WordBoundary" and word_boundaries is not None:
+                # edge-tts reports offsets in 100-nanosecond ticks
+                word_boundaries.append({
+                    "text": chunk["text"],
+                    "offset_ms": chunk["offset"] / 10000,
+                    "duration_ms": chunk["duration"] / 10000,
+                })
+        return buffer.getvalue()
+    except Exception as e:
+        print(f"Error streaming audio segment: {e}")
+        raise
+
+def mp3_duration_ms(data):
+    """
+    Duration of edge-tts MP3 data without decoding it.
+    The stream is constant bitrate, so the length follows from the byte count.
+    """
+    return len(data) * 8 / EDGE_TTS_BITRATE_KBPS
+
+def split_text(text, max_chars=PLAN_SPLIT_MAX_CHARS):
+    """
+    Splits text into chunks of at most max_chars, breaking at sentence ends,
+    then at clause punctuation, then at spaces.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    
+    pieces = SENTENCE_BREAK.split(text)
+    if len(pieces) == 1:
+        pieces = CLAUSE_BREAK.split(text)
+    if len(pieces) == 1:
+        pieces = text.split()
+    
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if len(piece) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(split_text(piece, max_chars) if piece != text else
+                          [piece[i:i + max_chars] for i in range(0, len(piece), max_chars)])
+        elif current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def plan_utterances(script_json, silence_duration=300, merge_max_chars=PLAN_MERGE_MAX_CHARS,
+                    split_max_chars=PLAN_SPLIT_MAX_CHARS):
+    """
+    Turns dialogue lines into balanced TTS requests.
+    
+    Consecutive lines from the same speaker are merged while one side is shorter
+    than merge_max_chars (and the result stays within split_max_chars). Lines
+    longer than split_max_chars are split at sentence boundaries. Order is kept.
+    
+    Pauses are deterministic: silence_duration after the last piece of every
+    original line, none between pieces of one split line. Merged lines share
+    one request, so their inner pause is the voice's own sentence break.
+    
+    Returns:
+        List of utterances: {"index", "lines", "speaker", "text", "pause_ms"},
+        where index is the first script line the utterance covers
+    """
+    utterances = []
+    
+    for index, item in enumerate(script_json):
+        speaker = item.get("speaker", "Siddharth")
+        text = item.get("text", "").strip()
+        if not text:
+            continue
+        
+        previous = utterances[-1] if utterances else None
+        if (previous and previous["speaker"] == speaker and not previous.get("split")
+                and (len(previous["text"]) < merge_max_chars or len(text) < merge_max_chars)
+                and len(previous["text"]) + 1 + len(text) <= split_max_chars):
+            previous["text"] = f"{previous['text']} {text}"
+            previous["lines"].append(index)
+            continue
+        
+        chunks = split_text(text, split_max_chars)
+        for position, chunk in enumerate(chunks):
+            last = position == len(chunks) - 1
+            utterances.append({
+                "index": index,
+                "lines": [index],
+                "speaker": speaker,
+                "text": chunk,
+                "pause_ms": silence_duration if last else 0,
+                "split": len(chunks) > 1,
+            })
+    
+    for utterance in utterances:
+        utterance.pop("split")
+    return utterances
+
+def plan_units(script_json, silence_duration=300, plan=False):
+    """
+    The TTS requests generate_full_audio makes for a script: one per line
+    (empty lines skipped) unless plan is on, then plan_utterances' output.
+    """
+    if plan:
+        return plan_utterances(script_json, silence_duration)
+    return plan_utterances(script_json, silence_duration, merge_max_chars=0,
+                           split_max_chars=float("inf"))
+
+async def warm_up_voices(language="English", voices=None):
+    """
+    Sends one tiny request per voice over the shared connector, so the DNS
+    lookup and the service's voice setup are paid before the first real line.
+    
+    Returns:
+        Dict mapping each voice to its request metrics (or an "error")
+    """
+    voices = voices or list(dict.fromkeys(VOICE_MAPPING.get(language, VOICE_MAPPING["English"]).values()))
+    text = WARMUP_TEXT.get(language, WARMUP_TEXT["English"])
+    
+    async def warm(voice):
+        metrics = {}
+        try:
+            async for _ in stream_speech(text, voice, rate_to_string(1.0), metrics):
+                pass
+        except Exception as e:
+            metrics["error"] = str(e)[:200]
+        return voice, metrics
+    
+    results = dict(await asyncio.gather(*[warm(voice) for voice in voices]))
+    for voice, metrics in results.items():
+        if "error" in metrics:
+            print(f"Warm-up failed for {voice}: {metrics['error']}")
+        else:
+            print(f"Warm-up {voice}: handshake {metrics['handshake_ms']:.0f}ms, "
+                  f"synthesis {metrics['synthesis_ms']:.0f}ms")
+    return results
+
+def start_voice_warm_up(language="English"):
+    """
+    Warm up a language's voices on the speech loop without blocking the caller.
+    Renders run on the same loop and connector afterwards.
+    
+    Returns:
+        concurrent.futures.Future with the warm_up_voices result
+    """
+    return run_on_speech_loop(warm_up_voices(language))
+
+class SpeechPrefetcher:
+    """
+    Synthesizes script lines on a background thread while the script is still
+    being generated, so the audio render that follows finds them in the
+    segment cache.
+    
+    Lines are planned exactly as generate_full_audio will plan them; the last
+    request is held back until the next line shows it can no longer grow (a
+    later line of the same speaker may still be merged into it).
+    """
+    def __init__(self, language="English", pacing="Normal (100%)", silence_duration=300,
+                 custom_speakers=None, plan=False, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.language_voices = VOICE_MAPPING.get(language, VOICE_MAPPING["English"])
+        self.custom_speakers = custom_speakers
+        self.rate = PACING_PRESETS.get(pacing, 1.0)
+        self.silence_duration = silence_duration
+        self.plan = plan
+        self.lines = []
+        self.submitted = 0
+        self.futures = []
+        self.loop = get_speech_loop()
+        self.semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+    
+    def add_line(self, line):
+        """Queue one finished dialogue line; requests that are final start synthesizing."""
+        self.lines.append(line)
+        units = plan_units(self.lines, self.silence_duration, self.plan)
+        self._submit(units[self.submitted:-1])
+    
+    def _submit(self, units):
+        for unit in units:
+            voice = resolve_voice(unit["speaker"], self.language_voices, self.custom_speakers)
+            self.futures.append(asyncio.run_coroutine_threadsafe(
+                synthesize_line(unit["index"], unit["text"], voice, self.rate, self.semaphore),
+                self.loop
+            ))
+            self.submitted += 1
+    
+    def finish(self, wait=True):
+        """
+        Submits the held-back request and, with wait, blocks until every
+        request is done (otherwise cancels them).
+        
+        Returns:
+            Dict with submitted, completed and failed request counts
+        """
+        self._submit(plan_units(self.lines, self.silence_duration, self.plan)[self.submitted:])
+        completed = failed = 0
+        for future in self.futures:
+            if not wait:
+                future.cancel()
+                continue
+            try:
+                future.result()
+                completed += 1
+            except Exception as e:
+                failed += 1
+                print(f"Prefetch failed: {e}")
+        
+        return {"submitted": self.submitted, "completed": completed, "failed": failed}
+
+def decode_mp3_bytes(data):
+    """
+    Decodes in-memory MP3 bytes into an AudioSegment.
+    The data is piped to ffmpeg; passing the codec skips the extra ffprobe call.
+    """
+    return AudioSegment.from_file(io.BytesIO(data), format="mp3", codec="mp3")
+
+async def synthesize_line(index, text, voice, rate, semaphore, max_retries=SEGMENT_MAX_RETRIES,
+                          in_memory=True, use_cache=True):
+    """
+    Synthesizes one dialogue line while holding a concurrency slot, retrying failures.
+    
+    With in_memory=True the edge-tts stream is buffered in memory, otherwise each
+    attempt goes through a temporary MP3 file. Lines already in the segment cache
+    (same text, voice and rate) are not synthesized again.
+    
+    Returns:
+        Tuple of (MP3 bytes, timing dict) for the line. The timing dict carries
+        the word boundaries reported by edge-tts (in-memory mode only).
+    """
+    started = time.perf_counter()
+    segment_key = get_segment_key(text, voice, rate_to_string(rate)) if use_cache else None
+    
+    cached = get_segment(segment_key) if segment_key else None
+    data, words = cached if cached else (None, [])
+    request_metrics = {}
+    attempt = 0
+    
+    if data is None:
+        for attempt in range(1, max_retries + 1):
+            temp_filename = None
+            words = []
+            try:
+                async with semaphore:
+                    if in_memory:
+                        data = await generate_audio_bytes(text, voice, rate=rate, word_boundaries=words,
+                                                          request_metrics=request_metrics)
+                    else:
+                        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3", mode='wb') as tmp:
+                            temp_filename = tmp.name
+                        await generate_audio_segment(text, voice, temp_filename, rate=rate)
+                        with open(temp_filename, 'rb') as f:
+                            data = f.read()
+                break
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+                delay = SEGMENT_RETRY_DELAY * 2 ** (attempt - 1)
+                print(f"Line {index+1}: attempt {attempt}/{max_retries} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            finally:
+                try:
+                    if temp_filename and os.path.exists(temp_filename):
+                        os.remove(temp_filename)
+                except Exception as e:
+                    print(f"Warning: Could not delete temp file {temp_filename}: {e}")
+        
+        if segment_key:
+            put_segment(segment_key, data, words)
+    
+    timing = {
+        "index": index,
+        "voice": voice,
+        "characters": len(text),
+        "attempts": attempt,
+        "cached": attempt == 0,
+        "seconds": round(time.perf_counter() - started, 3),
+        "duration_ms": mp3_duration_ms(data),
+        "words": words,
+        "handshake_ms": round(request_metrics.get("handshake_ms", 0.0), 1),
+        "connect_ms": round(request_metrics.get("connect_ms", 0.0), 1),
+        "synthesis_ms": round(request_metrics.get("synthesis_ms", 0.0), 1),
+        "connections": request_metrics.get("connections", 0),
+    }
+    return data, timing
+
+async def render_line(index, text, voice, rate, semaphore, assembly="pcm", **kwargs):
+    """
+    Synthesizes one line and, for PCM assembly, decodes it as soon as it arrives
+    so decoding overlaps with the lines still being synthesized.
+    
+    Returns:
+        Tuple of (MP3 bytes, AudioSegment or None for MP3 assembly, timing dict)
+    """
+    data, timing = await synthesize_line(index, text, voice, rate, semaphore, **kwargs)
+    if assembly == "mp3":
+        return data, None, timing
+    # Decoding spawns ffmpeg, keep it off the event loop
+    segment = await asyncio.to_thread(decode_mp3_bytes, data)
+    timing["duration_ms"] = len(segment)
+    return data, segment, timing
+
+def _pauses_for(count, silence_duration):
+    """Expand a single pause into one per segment; lists pass through."""
+    if isinstance(silence_duration, (list, tuple)):
+        return list(silence_duration)
+    return [silence_duration] * count
+
+def assemble_segments(segments, silence_duration):
+    """
+    Joins decoded segments, each followed by silence, in a single pass.
+    silence_duration is one pause for every segment or a list with one per segment.
+    
+    Repeated `combined += segment + silence` copies the whole accumulated buffer
+    every time (quadratic in episode length); this collects the raw PCM and
+    joins it once.
+    """
+    if not segments:
+        return AudioSegment.empty()
+    
+    first = segments[0]
+    silences = {}
+    
+    parts = []
+    for segment, pause_ms in zip(segments, _pauses_for(len(segments), silence_duration)):
+        if (segment.frame_rate, segment.channels, segment.sample_width) != \
+                (first.frame_rate, first.channels, first.sample_width):
+            segment = (segment.set_frame_rate(first.frame_rate)
+                       .set_channels(first.channels)
+                       .set_sample_width(first.sample_width))
+        if pause_ms not in silences:
+            silences[pause_ms] = (AudioSegment.silent(duration=pause_ms, frame_rate=first.frame_rate)
+                                  .set_channels(first.channels)
+                                  .set_sample_width(first.sample_width)).raw_data
+        parts.append(segment.raw_data)
+        parts.append(silences[pause_ms])
+    
+    return first._spawn(b"".join(parts))
+
+@lru_cache(maxsize=32)
+def get_silence_mp3(duration_ms):
+    """
+    Encodes a silence gap once in the same MP3 format edge-tts streams
+    (24 kHz mono, 48 kbit/s) so it can be spliced between raw segments.
+    No ID3 or Xing header is written, since those would land mid-stream.
+    """
+    buffer = io.BytesIO()
+    silence = AudioSegment.silent(duration=duration_ms, frame_rate=EDGE_TTS_FRAME_RATE).set_channels(1)
+    silence.export(buffer, format="mp3", bitrate=EDGE_TTS_BITRATE,
+                   parameters=["-write_xing", "0", "-id3v2_version", "0"])
+    return buffer.getvalue()
+
+def get_gap_mp3(duration_ms):
+    """Silence MP3 for a pause, empty for no pause."""
+    return get_silence_mp3(duration_ms) if duration_ms > 0 else b""
+
+def concat_mp3_segments(chunks, silence_duration):
+    """
+    Concatenates MP3 segments directly at the frame level, with no decode or
+    re-encode. Every segment must share the edge-tts stream format.
+    silence_duration is one pause for every segment or a list with one per segment.
+    """
+    parts = []
+    for chunk, pause_ms in zip(chunks, _pauses_for(len(chunks), silence_duration)):
+        parts.append(chunk)
+        parts.append(get_gap_mp3(pause_ms))
+    return b"".join(parts)
+
+async def _render_progressively(tasks, units, on_part, part_lines, render_started, stats=None):
+    """
+    Waits for line tasks in completion order and publishes every contiguous run
+    of finished lines as an MP3 part (frame-spliced, so no encode is needed).
+    
+    Returns:
+        Task results in script order, like asyncio.gather
+    """
+    positions = {task: position for position, task in enumerate(tasks)}
+    results = [None] * len(tasks)
+    pending = set(tasks)
+    next_position = 0
+    part_start = 0
+    parts = []
+    
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            results[positions[task]] = task.result()
+        
+        while next_position < len(tasks) and results[next_position] is not None:
+            next_position += 1
+        
+        # First part is a single line, then part_lines at a time, plus the tail
+        while next_position > part_start:
+            size = 1 if not parts else max(1, part_lines)
+            if next_position - part_start < size and next_position < len(tasks):
+                break
+            part_end = min(part_start + size, next_position)
+            chunk = [results[position][0] for position in range(part_start, part_end)]
+            pauses = [units[position]["pause_ms"] for position in range(part_start, part_end)]
+            info = {
+                "lines": sorted({line for position in range(part_start, part_end)
+                                 for line in units[position]["lines"]}),
+                "seconds_since_start": round(time.perf_counter() - render_started, 3),
+            }
+            parts.append(info)
+            if len(parts) == 1:
+                print(f"Time to first audio: {info['seconds_since_start']:.2f}s")
+            on_part(len(parts), concat_mp3_segments(chunk, pauses), info)
+            part_start = part_end
+    
+    if stats is not None:
+        stats["parts"] = parts
+        stats["time_to_first_audio"] = parts[0]["seconds_since_start"] if parts else None
+    return results
+
+def summarize_requests(line_timings):
+    """
+    Averages the handshake vs synthesis split over the lines that went to
+    edge-tts (cache hits and temp-file requests carry no metrics).
+    """
+    measured = [timing for timing in line_timings if timing.get("handshake_ms")]
+    if not measured:
+        return {"requests": 0, "connections_opened": 0,
+                "avg_handshake_ms": 0, "avg_connect_ms": 0, "avg_synthesis_ms": 0}
+    return {
+        "requests": len(measured),
+        "connections_opened": sum(timing["connections"] for timing in measured),
+        "avg_handshake_ms": round(sum(timing["handshake_ms"] for timing in measured) / len(measured), 1),
+        "avg_connect_ms": round(sum(timing["connect_ms"] for timing in measured) / len(measured), 1),
+        "avg_synthesis_ms": round(sum(timing["synthesis_ms"] for timing in measured) / len(measured), 1),
+    }
+
+def build_timeline(units, line_timings, gaps_ms):
+    """
+    Lays the measured utterance durations end to end (each followed by its gap
+    of silence) and converts word boundaries to episode time.
+    
+    Returns:
+        Dict with total_duration_ms and one entry per utterance: index, lines
+        (script lines it covers), speaker, text, start_ms, end_ms and words
+        (start_ms/end_ms/text)
+    """
+    segments = []
+    cursor = 0.0
+    for unit, timing, gap_ms in zip(units, line_timings, gaps_ms):
+        start_ms = cursor
+        end_ms = start_ms + timing["duration_ms"]
+        segments.append({
+            "index": unit["index"],
+            "lines": unit["lines"],
+            "speaker": unit["speaker"],
+            "text": unit["text"],
+            "start_ms": round(start_ms),
+            "end_ms": round(end_ms),
+            "words": [
+                {
+                    "text": word["text"],
+                    "start_ms": round(start_ms + word["offset_ms"]),
+                    "end_ms": round(start_ms + word["offset_ms"] + word["duration_ms"]),
+                }
+                for word in timing.get("words", [])
+            ],
+        })
+        cursor = end_ms + gap_ms
+    
+    return {"total_duration_ms": round(cursor), "segments": segments}
+
 async def generate_full_audio(script_json, language="English", pacing="Normal (100%)", 
-                             silence_duration=300, custom_speakers=None):
+                             silence_duration=300, custom_speakers=None,
+                             max_concurrency=DEFAULT_MAX_CONCURRENCY, stats=None, in_memory=True,
+                             use_cache=True, assembly="pcm", on_part=None,
+                             part_lines=DEFAULT_PART_LINES, return_timings=False, plan=False,
+                             audio_format=None, bitrate=None):
     """
     Orchestrates the full audio generation with language and pacing support.
     
+    Lines are synthesized concurrently (at most max_concurrency requests in flight)
+    and reassembled in script order. By default segments never touch the disk;
+    only the final episode is written out.
+    
+    With plan=True the lines first go through plan_utterances, which merges
+    short same-speaker lines and splits very long ones into balanced requests.
+    
+    The final file is encoded on a worker thread using the format and bitrate
+    from config.json (audio.format / audio.bitrate) unless overridden; see
+    EXPORT_PRESETS in src/encoding.py.
+    
+    With on_part set, playable MP3 parts are published as soon as the lines
+    before them are done: the first line on its own (to minimise time to first
+    audio), then part_lines lines at a time. on_part(part_number, mp3_bytes, info)
+    is called on the event loop thread, in order.
+    
     Args:
         script_json: List of dialogue items
         language: Language for TTS (English, Hindi, etc.)
         pacing: Pacing preset from PACING_PRESETS
         silence_duration: Pause between speakers in milliseconds
         custom_speakers: Dict mapping speaker names to voice preferences
+        max_concurrency: Maximum number of edge-tts requests in flight
+        stats: Optional dict, filled with per-line timings and totals
+        in_memory: Stream segments into memory instead of per-line temp files
+        use_cache: Reuse previously synthesized lines from the segment cache
+        assembly: "pcm" decodes and joins once before encoding,
+                  "mp3" splices the edge-tts MP3 frames without re-encoding
+        on_part: Optional callback receiving MP3 parts while rendering continues
+        part_lines: Lines per published part after the first one
+        return_timings: Return (audio path, timeline) instead of just the path;
+                        see build_timeline for the timeline layout
+        plan: Merge short lines and split long ones before synthesis
+        audio_format: Export preset name (mp3, mp3-speech, ogg, opus-speech)
+        bitrate: Export bitrate such as "64k"
     """
-    combined_audio = AudioSegment.empty()
-    temp_files = []
     final_path = None
+    tasks = []
+    render_started = time.perf_counter()
     
     # Get speech rate from pacing preset
     speech_rate = PACING_PRESETS.get(pacing, 1.0)
     
     # Get voices for language
     language_voices = VOICE_MAPPING.get(language, VOICE_MAPPING["English"])
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
     
     try:
-        # Create silence segment
-        silence = AudioSegment.silent(duration=silence_duration) 
-
-        for index, item in enumerate(script_json):
-            speaker = item.get("speaker", "Siddharth")
-            text = item.get("text", "")
-            
-            # Skip empty text
-            if not text.strip():
-                continue
-            
-            # Get voice - prioritize custom speaker mappings
-            if custom_speakers and speaker in custom_speakers:
-                voice = custom_speakers[speaker]
-            else:
-                voice = language_voices.get(speaker, list(language_voices.values())[0])
-            
-            # Create temp file for this segment
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3", mode='wb') as tmp:
-                temp_filename = tmp.name
-            
-            # Generate Audio with speech rate control
-            await generate_audio_segment(text, voice, temp_filename, rate=speech_rate)
-            temp_files.append(temp_filename)
-            
-            # Load and append
-            segment = AudioSegment.from_mp3(temp_filename)
-            combined_audio += segment + silence
-            
-            # Progress logging
-            progress = int((index + 1) / len(script_json) * 100)
-            print(f"Generated {progress}%: Line {index+1}/{len(script_json)} - {speaker}")
+        units = plan_units(script_json, silence_duration, plan)
+        
+        for unit in units:
+            voice = resolve_voice(unit["speaker"], language_voices, custom_speakers)
+            tasks.append(asyncio.ensure_future(
+                render_line(unit["index"], unit["text"], voice, speech_rate, semaphore, assembly=assembly,
+                            in_memory=in_memory, use_cache=use_cache)
+            ))
+        
+        if on_part is None:
+            # Results come back in submission order, i.e. script order
+            results = await asyncio.gather(*tasks)
+        else:
+            results = await _render_progressively(tasks, units, on_part, part_lines,
+                                                  render_started, stats)
+        
+        line_timings = []
+        for unit, (_, _, timing) in zip(units, results):
+            timing["speaker"] = unit["speaker"]
+            timing["lines"] = unit["lines"]
+            line_timings.append(timing)
+            source = "cached" if timing["cached"] else f"{timing['attempts']} attempt{'s' if timing['attempts'] > 1 else ''}"
+            print(f"Line {unit['index']+1}/{len(script_json)} - {unit['speaker']}: {timing['seconds']:.2f}s ({source})")
+        
+        cache_hits = sum(1 for timing in line_timings if timing["cached"])
+        if use_cache:
+            print(f"Segment cache: {cache_hits} hits, {len(line_timings) - cache_hits} misses")
 
         # Export final file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3", mode='wb') as final_out:
+        preset = resolve_export(audio_format, bitrate)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{preset['extension']}", mode='wb') as final_out:
             final_path = final_out.name
         
-        combined_audio.export(final_path, format="mp3")
-        print(f"Final audio exported to: {final_path}")
+        pauses = [unit["pause_ms"] for unit in units]
+        assembly_started = time.perf_counter()
+        if assembly == "mp3":
+            spliced = concat_mp3_segments([data for data, _, _ in results], pauses)
+            gaps_ms = [mp3_duration_ms(get_gap_mp3(pause_ms)) for pause_ms in pauses]
+            if preset["format"] == "mp3":
+                # Fast assembly keeps the voice stream as-is, whatever the bitrate
+                with open(final_path, 'wb') as f:
+                    f.write(spliced)
+                export_info = {"format": preset["name"], "bitrate": EDGE_TTS_BITRATE,
+                               "bytes": len(spliced), "encode_seconds": 0.0}
+            else:
+                export_info = await encode_audio_async(spliced, final_path, preset)
+        else:
+            combined_audio = assemble_segments([segment for _, segment, _ in results], pauses)
+            gaps_ms = pauses
+            export_info = await encode_audio_async(combined_audio, final_path, preset)
+        print(f"Final audio exported to: {final_path} ({export_info['format']}, "
+              f"{export_info['bytes'] / 1024:.0f} KB, encoded in {export_info['encode_seconds']:.2f}s)")
+        
+        timeline = build_timeline(units, line_timings, gaps_ms)
         
+        if stats is not None:
+            stats["in_memory"] = in_memory
+            stats["assembly"] = assembly
+            stats["max_concurrency"] = max_concurrency
+            stats["requests"] = len(units)
+            stats["line_timings"] = line_timings
+            stats["segment_cache"] = {"hits": cache_hits, "misses": len(line_timings) - cache_hits}
+            stats["assembly_seconds"] = round(time.perf_counter() - assembly_started, 3)
+            stats["total_seconds"] = round(time.perf_counter() - render_started, 3)
+            stats["audio_duration_ms"] = timeline["total_duration_ms"]
+            stats["export"] = export_info
+            stats["network"] = summarize_requests(line_timings)
+        
+        if return_timings:
+            return final_path, timeline
         return final_path
 
     except Exception as e:
         print(f"Error in Audio Generation: {e}")
         if final_path and os.path.exists(final_path):
             os.remove(final_path)
-        return None
+        return (None, None) if return_timings else None
     
     finally:
-        # Cleanup temporary files
-        for f in temp_files:
-            try:
-                if os.path.exists(f):
-                    os.remove(f)
-            except Exception as e:
-                print(f"Warning: Could not delete temp file {f}: {e}")
+        # Stop any lines still in flight after a failure
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
 # Wrapper function to run async code synchronously
 def create_podcast_audio(script_json, language="English", pacing="Normal (100%)", 
-                        silence_duration=300, custom_speakers=None):
+                        silence_duration=300, custom_speakers=None,
+                        max_concurrency=DEFAULT_MAX_CONCURRENCY, stats=None, in_memory=True,
+                        use_cache=True, assembly="pcm", on_part=None,
+                        part_lines=DEFAULT_PART_LINES, return_timings=False, plan=False,
+                        audio_format=None, bitrate=None):
     """
     Synchronous wrapper for async audio generation with enhanced options.
     
@@ -136,24 +740,35 @@ def create_podcast_audio(script_json, language="English", pacing="Normal (100%)"
         pacing: Speech speed/pacing
         silence_duration: Pause between speakers (ms)
         custom_speakers: Custom voice mappings
+        max_concurrency: Maximum parallel edge-tts requests
+        stats: Optional dict that receives per-line timings
+        in_memory: Keep per-line audio in memory (False uses temp files)
+        use_cache: Only synthesize lines that are not in the segment cache
+        assembly: "pcm" (decode, join once, encode) or "mp3" (splice frames, no re-encode)
+        on_part: Callback receiving playable MP3 parts while later lines render
+        part_lines: Lines per progressive part
+        return_timings: Return (audio path, timeline) with measured line and word timings
+        plan: Merge short same-speaker lines and split long ones into balanced requests
+        audio_format: Export preset (defaults to config.json audio.format)
+        bitrate: Export bitrate (defaults to config.json audio.bitrate)
     """
+    # Runs on the process-wide speech loop (shared with warm-up); parts are
+    # handed back so on_part runs on the caller's thread (Streamlit needs that)
+    parts = queue.Queue()
+    deliver = (lambda *part: parts.put(part)) if on_part else None
+    
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            import nest_asyncio
-            nest_asyncio.apply()
-            return loop.run_until_complete(
-                generate_full_audio(script_json, language, pacing, silence_duration, custom_speakers)
-            )
-        else:
-            return loop.run_until_complete(
-                generate_full_audio(script_json, language, pacing, silence_duration, custom_speakers)
-            )
-    except RuntimeError:
-        return asyncio.run(
-            generate_full_audio(script_json, language, pacing, silence_duration, custom_speakers)
-        )
+        future = run_on_speech_loop(generate_full_audio(
+            script_json, language, pacing, silence_duration, custom_speakers, max_concurrency, stats,
+            in_memory, use_cache, assembly, deliver, part_lines, return_timings, plan, audio_format, bitrate
+        ))
+        while on_part:
+            try:
+                on_part(*parts.get(timeout=0.1))
+            except queue.Empty:
+                if future.done() and parts.empty():
+                    break
+        return future.result()
     except Exception as e:
         print(f"Error in create_podcast_audio: {e}")
-        st.error(f"Audio generation failed: {str(e)[:200]}")
-        return None
+        return (None, None) if return_timings else None
@@ -0,0 +1,142 @@
+import asyncio
+import contextvars
+import threading
+import time
+import weakref
+import aiohttp
+import edge_tts
+
+# Connection reuse settings
+DNS_CACHE_TTL = 300  # seconds
+
+# Metrics dict of the request currently running in this task (see stream_speech)
+_request_metrics = contextvars.ContextVar("edge_tts_request_metrics", default=None)
+
+# One shared connector per event loop
+_connectors = weakref.WeakKeyDictionary()
+
+# Optional replacement for the edge-tts stream, e.g. an offline stand-in (see set_speech_stream)
+_speech_stream = None
+
+# Long-lived event loop for voice requests, shared by warm-up and renders (see get_speech_loop)
+_speech_loop = None
+_speech_loop_lock = threading.Lock()
+
+class SharedConnector(aiohttp.TCPConnector):
+    """
+    TCP connector shared by every edge-tts request on one event loop.
+    
+    edge-tts opens and closes a ClientSession per request, which would normally
+    close the connector (and its DNS cache) with it; this one ignores those
+    closes and is only torn down by shutdown(), so the host is resolved once
+    per loop. The websocket of each request is upgraded and never returns to
+    the pool, so every request still opens its own TCP/TLS connection.
+    Connection setup time (DNS, TCP, TLS) is recorded for the request that
+    triggered it.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._shutting_down = False
+    
+    def close(self, *args, **kwargs):
+        if not self._shutting_down:
+            return asyncio.sleep(0)
+        return super().close(*args, **kwargs)
+    
+    async def shutdown(self):
+        """Really close the connector and its pooled connections."""
+        self._shutting_down = True
+        await super().close()
+    
+    async def _create_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super()._create_connection(*args, **kwargs)
+        finally:
+            metrics = _request_metrics.get()
+            if metrics is not None:
+                metrics["connect_ms"] += (time.perf_counter() - started) * 1000
+                metrics["connections"] += 1
+
+def get_shared_connector():
+    """Return the connector for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    connector = _connectors.get(loop)
+    if connector is None or connector.closed:
+        connector = SharedConnector(ttl_dns_cache=DNS_CACHE_TTL)
+        _connectors[loop] = connector
+    return connector
+
+def get_speech_loop():
+    """
+    The process-wide event loop for voice requests, started on a daemon thread
+    on first use. Warm-up and every create_podcast_audio render run on it, so
+    they share one SharedConnector (and its DNS cache) for the process lifetime.
+    """
+    global _speech_loop
+    with _speech_loop_lock:
+        if _speech_loop is None:
+            _speech_loop = asyncio.new_event_loop()
+            threading.Thread(target=_speech_loop.run_forever, name="audiolearn-speech", daemon=True).start()
+        return _speech_loop
+
+def run_on_speech_loop(coroutine):
+    """Schedule a coroutine on the speech loop; returns a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_speech_loop())
+
+async def close_shared_connector():
+    """Shut down the running loop's connector. Call before a short-lived loop ends."""
+    connector = _connectors.pop(asyncio.get_running_loop(), None)
+    if connector is not None:
+        await connector.shutdown()
+
+def create_communicate(text, voice, rate_str):
+    """
+    Builds an edge-tts request that reports word boundaries and runs over the
+    shared connector. Older edge-tts releases lack these options (and always
+    send word boundaries), so fall back to a plain request there.
+    """
+    try:
+        return edge_tts.Communicate(text, voice, rate=rate_str, boundary="WordBoundary",
+                                    connector=get_shared_connector())
+    except TypeError:
+        return edge_tts.Communicate(text, voice, rate=rate_str)
+
+def set_speech_stream(stream=None):
+    """
+    Route stream_speech to stream(text, voice, rate_str), an async generator
+    yielding edge-tts style chunks (see benchmarks/fakes.py). None restores edge-tts.
+    """
+    global _speech_stream
+    _speech_stream = stream
+
+async def stream_speech(text, voice, rate_str, metrics=None):
+    """
+    Streams edge-tts chunks for one request.
+    
+    If metrics is a dict it is filled with:
+        handshake_ms: request start until the first message (connect, upgrade, first response)
+        connect_ms: part of the handshake spent opening connections (0 when reused)
+        connections: number of new connections opened
+        synthesis_ms: first message until the stream ends
+    """
+    metrics = metrics if metrics is not None else {}
+    metrics.update({"connect_ms": 0.0, "connections": 0, "handshake_ms": 0.0, "synthesis_ms": 0.0})
+    token = _request_metrics.set(metrics)
+    started = time.perf_counter()
+    first_message = None
+    
+    try:
+        if _speech_stream is not None:
+            chunks = _speech_stream(text, voice, rate_str)
+        else:
+            chunks = create_communicate(text, voice, rate_str).stream()
+        async for chunk in chunks:
+            if first_message is None:
+                first_message = time.perf_counter()
+                metrics["handshake_ms"] = (first_message - started) * 1000
+            yield chunk
+    finally:
+        _request_metrics.reset(token)
+        if first_message is not None:
+            metrics["synthesis_ms"] = (time.perf_counter() - first_message) * 1000
@@ -2,9 +2,11 @@ import streamlit as st
 import json
 from datetime import datetime
 
-def generate_podcast_metadata(filename, script_data, settings):
+def generate_podcast_metadata(filename, script_data, settings, timings=None):
     """
     Generates comprehensive metadata for the podcast.
+    Pass the timeline from create_podcast_audio(..., return_timings=True) to
+    report the measured duration instead of an estimate.
     """
     metadata = {
         "podcast_info": {
@@ -31,6 +33,9 @@ def generate_podcast_metadata(filename, script_data, settings):
             "speakers_in_script": list(set([line.get("speaker") for line in script_data]))
         }
     }
+    if timings:
+        metadata["script_summary"]["duration_minutes"] = round(timings["total_duration_ms"] / 60000, 2)
+        metadata["script_summary"]["duration_source"] = "measured"
     return metadata
 
 def generate_podcast_stats(script_data):
@@ -98,12 +103,35 @@ def display_script_analysis(script_data):
             with col3:
                 st.metric("Avg. Line Length", data["avg_line_length"])
 
-def create_srt_subtitles(script_data, avg_chars_per_second=15):
+def format_timestamp(milliseconds, separator=","):
+    """
+    Formats milliseconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (WebVTT).
+    """
+    milliseconds = max(0, int(round(milliseconds)))
+    hours, remainder = divmod(milliseconds, 3600000)
+    minutes, remainder = divmod(remainder, 60000)
+    seconds, millis = divmod(remainder, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}"
+
+def create_srt_subtitles(script_data, avg_chars_per_second=15, timings=None):
     """
     Generates SRT subtitle format from script.
     SRT format is compatible with most video players.
+    
+    With timings (the timeline from create_podcast_audio(..., return_timings=True))
+    cues use the measured line positions; otherwise durations are estimated
+    from character counts.
     """
     srt_content = []
+    
+    if timings:
+        for number, segment in enumerate(timings["segments"], 1):
+            srt_content.append(f"{number}")
+            srt_content.append(f"{format_timestamp(segment['start_ms'])} --> {format_timestamp(segment['end_ms'])}")
+            srt_content.append(f"{segment['speaker']}: {segment['text']}")
+            srt_content.append("")
+        return "\n".join(srt_content)
+    
     current_time = 0
     
     for index, line in enumerate(script_data, 1):
@@ -116,21 +144,8 @@ def create_srt_subtitles(script_data, avg_chars_per_second=15):
         # Estimate duration based on character count
         duration = len(text) / avg_chars_per_second
         
-        start_time = int(current_time)
-        end_time = int(current_time + duration)
-        
-        start_ms = (start_time % 60) * 1000
-        start_sec = start_time % 60
-        start_min = (start_time // 60) % 60
-        start_hour = start_time // 3600
-        
-        end_ms = (end_time % 60) * 1000
-        end_sec = end_time % 60
-        end_min = (end_time // 60) % 60
-        end_hour = end_time // 3600
-        
         srt_content.append(f"{index}")
-        srt_content.append(f"{start_hour:02d}:{start_min:02d}:{start_sec:02d},000 --> {end_hour:02d}:{end_min:02d}:{end_sec:02d},000")
+        srt_content.append(f"{format_timestamp(current_time * 1000)} --> {format_timestamp((current_time + duration) * 1000)}")
         srt_content.append(f"{speaker}: {text}")
         srt_content.append("")
         
@@ -138,6 +153,32 @@ def create_srt_subtitles(script_data, avg_chars_per_second=15):
     
     return "\n".join(srt_content)
 
+def create_webvtt_subtitles(timings, word_level=True):
+    """
+    Generates WebVTT subtitles from a measured timeline.
+    
+    Each line becomes one cue with a voice tag for the speaker. With word_level,
+    every word carries an inline timestamp from the edge-tts word boundaries,
+    so players that support it can highlight words as they are spoken.
+    """
+    vtt_content = ["WEBVTT", ""]
+    
+    for number, segment in enumerate(timings["segments"], 1):
+        vtt_content.append(f"{number}")
+        vtt_content.append(f"{format_timestamp(segment['start_ms'], '.')} --> {format_timestamp(segment['end_ms'], '.')}")
+        
+        if word_level and segment["words"]:
+            words = " ".join(
+                f"<{format_timestamp(word['start_ms'], '.')}>{word['text']}"
+                for word in segment["words"]
+            )
+            vtt_content.append(f"<v {segment['speaker']}>{words}")
+        else:
+            vtt_content.append(f"<v {segment['speaker']}>{segment['text']}")
+        vtt_content.append("")
+    
+    return "\n".join(vtt_content)
+
 def create_transcript(script_data):
     """
     Creates a readable transcript of the podcast.
@@ -0,0 +1,38 @@
+from benchmarks.fakes import FakeRedis
+from src import cache
+
+
+def test_cache_info_reports_the_active_backend_limit(tmp_path):
+    try:
+        cache.set_cache_backend(cache.DiskCacheBackend(str(tmp_path), max_bytes=1234))
+        cache.save_to_cache({"text": "hello"}, "key", stage="markdown")
+        info = cache.get_cache_info()
+        assert info["max_bytes"] == 1234
+        assert info["stages"]["markdown"]["entries"] == 1
+
+        cache.set_cache_backend(cache.RedisCacheBackend(FakeRedis()))
+        assert cache.get_cache_info()["max_bytes"] is None
+    finally:
+        cache.set_cache_backend(None)
+
+
+def test_audio_key_depends_on_assembly():
+    script = [{"speaker": "Aditi", "text": "Hello"}]
+    args = (script, "English", {"Aditi": "voice"}, "Slow (75%)", 300, "mp3@128k", True)
+
+    assert cache.get_audio_key(*args, "mp3") != cache.get_audio_key(*args, "pcm")
+
+
+def test_corrupt_json_payload_counts_as_error(tmp_path):
+    try:
+        cache.set_cache_backend(cache.DiskCacheBackend(str(tmp_path)))
+        cache.reset_cache_metrics()
+        cache.save_bytes_to_cache(b'{"dialogue": [', "broken", stage="script")
+
+        assert cache.get_from_cache("broken", stage="script") is None
+        metrics = cache.get_cache_metrics()["script"]
+        assert metrics["errors"] == 1
+        assert metrics["hits"] == 0
+    finally:
+        cache.set_cache_backend(None)
+        cache.reset_cache_metrics()
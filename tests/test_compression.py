@@ -0,0 +1,39 @@
+from src.compression import compress_text
+
+
+def page(header, body, number):
+    return [header, "", body, "", str(number), "", "-----", ""]
+
+
+def test_repeated_lines_dropped_only_at_page_boundaries():
+    lines = []
+    for number in range(1, 5):
+        lines += page("Journal of Plant Biology", f"Body text of page {number}.", number)
+    # The same short line repeated inside the body is content, not furniture
+    lines += ["Step one.", "Repeat after me.", "Step two.", "Repeat after me.", "Step three.", "Repeat after me.",
+              "The end."]
+    text, report = compress_text("\n".join(lines), token_budget=None)
+
+    assert "Journal of Plant Biology" not in text
+    assert text.count("Repeat after me.") == 3
+    assert "Body text of page 4." in text
+
+
+def test_code_blocks_are_left_alone():
+    code = ["```python", "values = load()", "first = values[0]", "return first", "```"]
+    lines = ["Intro [3]."] + code * 3 + ["Outro."]
+    text, _ = compress_text("\n".join(lines), token_budget=None)
+
+    assert text.count("first = values[0]") == 3
+    assert text.count("return first") == 3
+    assert "Intro." in text
+
+
+def test_year_line_and_indexing_survive():
+    text, report = compress_text("Founded in\n2020\nwhere a[0] holds the seed [12].\n14", token_budget=None)
+
+    assert "2020" in text
+    assert "a[0]" in text
+    assert "[12]" not in text
+    assert "\n14" not in text
+    assert report["removed_chars"]["citations"] == len(" [12]")
@@ -0,0 +1,89 @@
+import asyncio
+import httpx
+import pytest
+from groq import RateLimitError
+from benchmarks.fakes import FakeGroq, FakeGroqSettings
+from src import llm_client
+from src.rate_limit import configure_rate_limiter
+
+MESSAGES = [{"role": "user", "content": "Summarize the paper."}]
+
+
+@pytest.fixture
+def limiter():
+    limiter = configure_rate_limiter(requests_per_minute=1000, tokens_per_minute=100000)
+    yield limiter
+    configure_rate_limiter()
+
+
+@pytest.fixture(autouse=True)
+def fake_groq():
+    llm_client.set_client_factory(lambda: FakeGroq(FakeGroqSettings(first_token_seconds=0.0, tokens_per_second=1e6, lines=4, jitter=0.0)))
+    yield
+    llm_client.set_client_factory(None)
+
+
+def test_failed_request_returns_its_reservation(limiter):
+    async def fail(used):
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(llm_client.scheduled(fail, MESSAGES, 500))
+    assert limiter.tokens.level == pytest.approx(limiter.tokens.capacity, abs=5)
+
+
+def test_rate_limited_attempt_is_refunded_before_queueing_again(limiter, monkeypatch):
+    monkeypatch.setattr(llm_client, "retry_after_seconds", lambda error: 0.0)
+    reserved = llm_client.reserved_tokens(MESSAGES, 500)
+    levels = []
+
+    async def request(used):
+        levels.append(limiter.tokens.level)
+        if len(levels) == 1:
+            response = httpx.Response(429, request=httpx.Request("POST", "https://api.groq.com"))
+            raise RateLimitError("slow down", response=response, body=None)
+        used["prompt_tokens"], used["completion_tokens"] = 10, 20
+        return "ok"
+
+    result, _ = asyncio.run(llm_client.scheduled(request, MESSAGES, 500))
+    assert result == "ok"
+    # Both attempts saw one reservation taken, not two
+    assert levels[1] == pytest.approx(levels[0], abs=5)
+    assert limiter.tokens.level == pytest.approx(limiter.tokens.capacity - 30, abs=5)
+    assert levels[0] == pytest.approx(limiter.tokens.capacity - reserved, abs=5)
+
+
+def test_stream_deadline_covers_opening_and_reading(limiter, monkeypatch):
+    closed = []
+
+    class SlowStream:
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            await asyncio.sleep(0.3)
+            raise StopAsyncIteration
+
+        async def close(self):
+            closed.append(True)
+
+    async def create(**kwargs):
+        await asyncio.sleep(0.3)
+        return SlowStream()
+
+    async def run():
+        llm_client.get_async_client().chat.completions.create = create
+        return await llm_client.stream_chat_completion(MESSAGES, "model", 500, timeout=0.5)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+    assert closed == [True]
+    assert limiter.tokens.level == pytest.approx(limiter.tokens.capacity, abs=5)
+
+
+def test_stream_settles_reported_usage(limiter):
+    text, usage = asyncio.run(llm_client.stream_chat_completion(MESSAGES, "model", 2000))
+    assert text
+    spent = usage["prompt_tokens"] + usage["completion_tokens"]
+    assert spent > 0
+    assert limiter.tokens.level == pytest.approx(limiter.tokens.capacity - spent, abs=5)
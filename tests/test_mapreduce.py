@@ -0,0 +1,61 @@
+import asyncio
+from src import mapreduce
+from src.mapreduce import split_sections
+
+
+def test_oversized_paragraph_splits_at_sentence_ends():
+    sentence = "Plants turn light into sugar. "
+    paragraph = sentence * 20
+    chunks = split_sections(paragraph.strip(), max_chars=100)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    for chunk in chunks:
+        for piece in chunk.split("\n\n"):
+            assert piece.endswith("sugar.")
+    assert " ".join(" ".join(chunk.split("\n\n")) for chunk in chunks) == paragraph.strip()
+
+
+def test_oversized_paragraph_without_sentences_splits_at_spaces():
+    words = " ".join(f"word{i}" for i in range(100))
+    chunks = split_sections(words, max_chars=60)
+
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    pieces = [piece for chunk in chunks for piece in chunk.split("\n\n")]
+    assert " ".join(pieces) == words
+
+
+def test_preamble_is_not_condensed(monkeypatch):
+    condensed = []
+    prompts = []
+
+    async def condense_document(text, model, *args, **kwargs):
+        condensed.append(text)
+        return "digest", {"sections": 1, "input_chars": len(text), "output_chars": 6, "seconds": 0}
+
+    async def generate_script_async(text, *args, **kwargs):
+        prompts.append(text)
+        return [{"speaker": "A", "text": "Hi"}]
+
+    monkeypatch.setattr(mapreduce, "condense_document", condense_document)
+    monkeypatch.setattr(mapreduce, "generate_script_async", generate_script_async)
+    asyncio.run(mapreduce.generate_script_map_reduce("long document", preamble="(Episode 2 of 3.)\n\n"))
+
+    assert condensed == ["long document"]
+    assert prompts == ["(Episode 2 of 3.)\n\ndigest"]
+
+
+def test_episodes_keep_headings_and_sentences_apart():
+    from src.series import split_into_episodes
+
+    sentence = "Leaves capture light here. "
+    text = "\n\n".join(f"# Chapter {number}\n\n" + (sentence * 40).strip() + "\n\n" + (sentence * 40).strip()
+                       for number in range(1, 7))
+    episodes = split_into_episodes(text, 3)
+
+    assert len(episodes) == 3
+    for episode in episodes:
+        assert "here.Leaves" not in episode
+        assert "here.#" not in episode
+        for line in episode.splitlines():
+            assert "#" not in line or line.startswith("# Chapter")
+    assert sum(episode.count("# Chapter") for episode in episodes) == 6
@@ -0,0 +1,37 @@
+import asyncio
+import json
+from src import multilingual
+
+BATCH = [{"speaker": "Aditi", "text": "Hello"}, {"speaker": "Siddharth", "text": "Hi there"}]
+USAGE = {"prompt_tokens": 1, "completion_tokens": 1}
+
+
+def reply(count):
+    return json.dumps({"dialogue": [{"speaker": "X", "text": f"Vanakkam {i}"} for i in range(count)]})
+
+
+def test_mismatched_batch_is_retried(monkeypatch):
+    replies = [reply(1), reply(2)]
+
+    async def chat_completion(*args, **kwargs):
+        return replies.pop(0), USAGE
+
+    monkeypatch.setattr(multilingual, "chat_completion", chat_completion)
+    monkeypatch.setattr(multilingual, "backoff_delay", lambda attempt, base: 0)
+    lines, _ = asyncio.run(multilingual.translate_batch(BATCH, "Tamil", "model"))
+
+    assert [line["text"] for line in lines] == ["Vanakkam 0", "Vanakkam 1"]
+    assert [line["speaker"] for line in lines] == ["Aditi", "Siddharth"]
+
+
+def test_language_fails_instead_of_keeping_the_originals(monkeypatch):
+    async def chat_completion(*args, **kwargs):
+        return reply(1), USAGE
+
+    monkeypatch.setattr(multilingual, "chat_completion", chat_completion)
+    monkeypatch.setattr(multilingual, "backoff_delay", lambda attempt, base: 0)
+    results, report = asyncio.run(multilingual.render_languages_async(BATCH, ["Tamil"]))
+
+    assert results["Tamil"]["script"] is None
+    assert results["Tamil"]["translated"] is False
+    assert "1 of 2 lines" in report["languages"]["Tamil"]["error"]
@@ -0,0 +1,12 @@
+import asyncio
+import pytest
+from src.rate_limit import RateLimiter
+
+
+def test_oversized_reservation_is_not_over_refunded():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1000)
+    asyncio.run(limiter.acquire(5000))
+    limiter.settle(5000, 800)
+
+    # The call took a full bucket and used 800, so 200 are left (not the full bucket)
+    assert limiter.tokens.level == pytest.approx(200, abs=5)
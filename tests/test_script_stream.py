@@ -0,0 +1,19 @@
+import json
+from src.script_stream import repair_json
+
+
+def test_quoted_speech_inside_a_line_is_kept():
+    raw = ('Here you go:\n```json\n{"dialogue": [\n'
+           '{"speaker": "Aditi", "text": "She said “wow” and wrote {\\"a\\": 1} }{ on the board"}\n'
+           '{"speaker": "Siddharth", "text": "Lists end like [1, 2, ] here",},\n]}\n```')
+    data = json.loads(repair_json(raw))
+
+    assert data["dialogue"][0]["text"] == 'She said “wow” and wrote {"a": 1} }{ on the board'
+    assert data["dialogue"][1]["text"] == "Lists end like [1, 2, ] here"
+
+
+def test_smart_quote_delimiters_are_repaired():
+    raw = '{“dialogue”: [{“speaker”: “Aditi”, “text”: “He called it "magic"\nreally”}]}'
+    data = json.loads(repair_json(raw))
+
+    assert data["dialogue"][0] == {"speaker": "Aditi", "text": 'He called it "magic"\nreally'}
@@ -0,0 +1,71 @@
+import threading
+from src import singleflight
+
+
+def test_follower_takes_over_when_leader_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(singleflight, "INFLIGHT_DIR", str(tmp_path))
+    leader_started = threading.Event()
+    release_leader = threading.Event()
+    results = {}
+
+    def failing():
+        leader_started.set()
+        release_leader.wait(5)
+        return None
+
+    leader = threading.Thread(target=lambda: results.update(leader=singleflight.run_single_flight("key", failing)))
+    leader.start()
+    leader_started.wait(5)
+
+    follower = threading.Thread(target=lambda: results.update(
+        follower=singleflight.run_single_flight("key", lambda: "script", on_wait=release_leader.set)
+    ))
+    follower.start()
+    leader.join(5)
+    follower.join(5)
+
+    assert results["leader"] == (None, False)
+    assert results["follower"] == ("script", False)
+
+
+def test_follower_shares_leader_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(singleflight, "INFLIGHT_DIR", str(tmp_path))
+    leader_started = threading.Event()
+    release_leader = threading.Event()
+    results = {}
+
+    def generate():
+        leader_started.set()
+        release_leader.wait(5)
+        return "script"
+
+    leader = threading.Thread(target=lambda: results.update(leader=singleflight.run_single_flight("key", generate)))
+    leader.start()
+    leader_started.wait(5)
+    results["follower"] = singleflight.run_single_flight("key", lambda: "other", on_wait=release_leader.set)
+    leader.join(5)
+
+    assert results["leader"] == ("script", False)
+    assert results["follower"] == ("script", True)
+
+
+def test_follower_takes_over_after_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(singleflight, "INFLIGHT_DIR", str(tmp_path))
+    leader_started = threading.Event()
+    release_leader = threading.Event()
+
+    def stuck():
+        leader_started.set()
+        release_leader.wait(5)
+        return "late"
+
+    leader = threading.Thread(target=lambda: singleflight.run_single_flight("slow", stuck))
+    leader.start()
+    leader_started.wait(5)
+    try:
+        result = singleflight.run_single_flight("slow", lambda: "fresh", wait_timeout=0.1)
+    finally:
+        release_leader.set()
+        leader.join(5)
+
+    assert result == ("fresh", False)
@@ -0,0 +1,67 @@
+import aiohttp
+import aiohttp.connector
+from aiohttp import web
+from src import tts, tts_client
+
+
+class CountingResolver(aiohttp.resolver.ThreadedResolver):
+    lookups = 0
+
+    async def resolve(self, host, port=0, family=0):
+        CountingResolver.lookups += 1
+        return await super().resolve(host, port, family)
+
+
+async def start_server():
+    async def speak(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_bytes(b"audio")
+        await ws.close()
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/speak", speak)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "localhost", 0)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+def test_render_after_warm_up_reuses_connector_and_skips_dns(monkeypatch):
+    # Start from a fresh connector so the counting resolver is used
+    tts_client.run_on_speech_loop(tts_client.close_shared_connector()).result(timeout=5)
+    monkeypatch.setattr(aiohttp.connector, "DefaultResolver", CountingResolver)
+    CountingResolver.lookups = 0
+
+    runner, port = tts_client.run_on_speech_loop(start_server()).result(timeout=5)
+    connectors = []
+
+    async def fake_stream(text, voice, rate_str):
+        connector = tts_client.get_shared_connector()
+        connectors.append(connector)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async with session.ws_connect(f"http://localhost:{port}/speak") as ws:
+                message = await ws.receive()
+                yield {"type": "audio", "data": message.data}
+
+    async def render():
+        metrics = {}
+        chunks = [chunk async for chunk in tts_client.stream_speech("Hello", "voice", "+0%", metrics)]
+        return chunks, metrics
+
+    tts_client.set_speech_stream(fake_stream)
+    try:
+        warmed = tts.start_voice_warm_up("English").result(timeout=10)
+        chunks, metrics = tts_client.run_on_speech_loop(render()).result(timeout=10)
+    finally:
+        tts_client.set_speech_stream(None)
+        tts_client.run_on_speech_loop(runner.cleanup()).result(timeout=5)
+
+    assert not any("error" in metrics for metrics in warmed.values())
+    assert chunks == [{"type": "audio", "data": b"audio"}]
+    # Warm-up resolved the host once; the render found it in the shared DNS cache
+    assert CountingResolver.lookups == 1
+    assert len(set(map(id, connectors))) == 1
+    assert not connectors[0].closed